@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Operation, Record
+from .models import ArchivedRecord, Operation, Record
 
 
 class OperationAdmin(admin.ModelAdmin):
@@ -13,5 +13,34 @@ class RecordAdmin(admin.ModelAdmin):
     list_filter = ("operation", "user")
 
 
+class ArchivedRecordAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "operation",
+        "user",
+        "amount",
+        "user_balance",
+        "operation_response",
+        "status",
+        "creation_date",
+        "archive_date",
+    )
+    list_filter = ("operation", "status")
+    list_select_related = ("operation", "user")
+    search_fields = ("user__username",)
+    date_hierarchy = "creation_date"
+
+    # the archive is history, it's only written by compact_records
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Operation, OperationAdmin)
 admin.site.register(Record, RecordAdmin)
+admin.site.register(ArchivedRecord, ArchivedRecordAdmin)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class RecordsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.records"
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import signals  # noqa: F401
+        from .operations import registry
+
+        registry.build(settings.RECORDS_OPERATION_HANDLERS)
@@ -0,0 +1,60 @@
+import threading
+
+from django.core.cache import cache
+
+
+class CacheStats:
+    """Process wide hit/miss counters for the records lookups."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+stats = CacheStats()
+
+
+def user_key(username) -> str:
+    return f"user_{username}"
+
+
+def get_or_load(key: str, loader):
+    """Return the cached value for `key`, calling `loader` on a miss."""
+    value = cache.get(key)
+    stats.record(hit=value is not None)
+    if value is None:
+        value = loader()
+        cache.set(key, value)
+    return value
+
+
+async def aget_or_load(key: str, loader):
+    """Async `get_or_load`, `loader` is a coroutine function."""
+    value = await cache.aget(key)
+    stats.record(hit=value is not None)
+    if value is None:
+        value = await loader()
+        await cache.aset(key, value)
+    return value
+
+
+def invalidate(*keys: str):
+    cache.delete_many(keys)
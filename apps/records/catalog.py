@@ -0,0 +1,43 @@
+import hashlib
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+
+from .models import Operation
+from .serializers import OperationSerializer
+
+
+class OperationCatalog:
+    """
+    The serialized operation list and its strong ETag, kept in process memory
+    and rebuilt only after an `Operation` is saved or deleted.
+    """
+
+    def __init__(self):
+        self.cached = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        cached = self.cached
+        if cached is None:
+            with self._lock:
+                if self.cached is None:
+                    self.cached = self.build()
+                cached = self.cached
+        return cached
+
+    async def aget(self):
+        return self.cached or await sync_to_async(self.get)()
+
+    def build(self):
+        data = OperationSerializer(Operation.objects.all(), many=True).data
+        body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        etag = f'"{hashlib.sha256(body.encode()).hexdigest()}"'
+        return data, etag
+
+    def reset(self):
+        self.cached = None
+
+
+catalog = OperationCatalog()
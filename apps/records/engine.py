@@ -0,0 +1,49 @@
+from .operations import OperationError
+
+# Integer inputs up to this magnitude can be multiplied without overflowing
+# int64, larger ones go through the scalar path so they keep Python semantics.
+INT_SAFE_LIMIT = 2**31
+
+# Splitting the inputs into columns and converting the results back to Python
+# objects has a fixed cost; below this size the scalar loop is faster.
+VECTORIZE_MIN_ITEMS = 2048
+
+DIVISION_BY_ZERO = "Division by zero not allowed"
+NEGATIVE_SQUARE_ROOT = "Square root of a negative number not allowed"
+
+
+def evaluate(types, xs, ys, scalar_operations):
+    """
+    Evaluate the operations described by three parallel sequences: operation
+    types, first inputs and second inputs.
+
+    The items are split into columns and every operation is computed with
+    one NumPy call per input kind (int pairs keep integer results, anything
+    else is float64, as in Python). Operations without a vectorized kernel,
+    and integers too large for int64, go through `scalar_operations`. Returns
+    two lists, results and errors, aligned with the inputs.
+    """
+    size = len(types)
+    if size < VECTORIZE_MIN_ITEMS:
+        results, errors = [], []
+        for operation_type, num1, num2 in zip(types, xs, ys):
+            result, error = _scalar(scalar_operations, operation_type, num1, num2)
+            results.append(result)
+            errors.append(error)
+        return results, errors
+
+    # imported here so that only batches this large pay for loading NumPy
+    from . import vectorized
+
+    return vectorized.evaluate(types, xs, ys, scalar_operations)
+
+
+def _scalar(scalar_operations, operation_type, num1, num2):
+    if operation_type == "Division" and num2 == 0:
+        return None, DIVISION_BY_ZERO
+    if operation_type == "Square root" and num1 < 0:
+        return None, NEGATIVE_SQUARE_ROOT
+    try:
+        return scalar_operations[operation_type](num1, num2), None
+    except OperationError as error:
+        return None, str(error)
@@ -0,0 +1,52 @@
+import csv
+import json
+
+FIELDS = [
+    "id",
+    "creation_date",
+    "amount",
+    "user_balance",
+    "operation_response",
+    "operation_type",
+]
+# what each exported field is read from, `values_list` skips building models
+COLUMNS = [
+    "id",
+    "creation_date",
+    "amount",
+    "user_balance",
+    "operation_response",
+    "operation__type",
+]
+
+
+class Echo:
+    """File-like object whose `write` hands the line back to the csv writer."""
+
+    def write(self, value):
+        return value
+
+
+def rows(queryset, chunk_size):
+    for row in queryset.values_list(*COLUMNS).iterator(chunk_size=chunk_size):
+        row = list(row)
+        row[1] = row[1].isoformat()
+        yield row
+
+
+def ndjson(queryset, chunk_size):
+    for row in rows(queryset, chunk_size):
+        yield json.dumps(dict(zip(FIELDS, row))) + "\n"
+
+
+def csv_lines(queryset, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", ndjson),
+    "csv": ("text/csv", csv_lines),
+}
@@ -0,0 +1,185 @@
+import ast
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+from .operations import OperationError, OperationHandler
+
+# Compiled plans kept per normalized expression.
+PLAN_CACHE_SIZE = 512
+
+# Bounds on what a single request can ask for, checked before and after
+# parsing, so neither the parser nor the evaluation can be made expensive.
+MAX_LENGTH = 256
+MAX_OPERATIONS = 32
+
+BINARY_OPERATIONS = {
+    ast.Add: "Addition",
+    ast.Sub: "Subtraction",
+    ast.Mult: "Multiplication",
+    ast.Div: "Division",
+}
+FUNCTIONS = {"sqrt": "Square root"}
+
+_SPACES = re.compile(r"\s+")
+_SPACES_AROUND_SYMBOLS = re.compile(r"\s*([^\w\s.])\s*")
+
+
+class ExpressionError(Exception):
+    pass
+
+
+class Plan:
+    """
+    A compiled expression: the variables it reads, how many times it uses
+    each primitive operation, and a tree of closures that evaluates it.
+    """
+
+    def __init__(self, expression, evaluate, variables, operations):
+        self.expression = expression
+        self._evaluate = evaluate
+        self.variables = variables
+        self.operations = operations
+
+    def cost(self, costs) -> int:
+        """The sum of the node costs, `costs` maps operation types to costs."""
+        return sum(costs[type] * count for type, count in self.operations.items())
+
+    def evaluate(self, values, handlers):
+        """
+        Evaluate with the variable `values` and the primitive `handlers` of
+        the registry. Raises ExpressionError on invalid inputs, e.g. a
+        division by zero anywhere in the tree.
+        """
+        return self._evaluate(values, handlers)
+
+
+def normalize(expression: str) -> str:
+    """Drop the spaces that don't separate two names or numbers."""
+    return _SPACES_AROUND_SYMBOLS.sub(r"\1", _SPACES.sub(" ", expression.strip()))
+
+
+def compile_expression(expression: str) -> Plan:
+    if not isinstance(expression, str) or not expression.strip():
+        raise ExpressionError("expression must be a non empty string")
+    if len(expression) > MAX_LENGTH:
+        raise ExpressionError(
+            f"expression can't be longer than {MAX_LENGTH} characters"
+        )
+    return _compile(normalize(expression))
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile(expression: str) -> Plan:
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        raise ExpressionError(f"Invalid expression: {expression}")
+
+    variables = set()
+    operations = Counter()
+    evaluate = _compile_node(tree.body, variables, operations)
+    if not operations:
+        # it would cost nothing, yet still be recorded
+        raise ExpressionError("expression must use at least one operation")
+    if sum(operations.values()) > MAX_OPERATIONS:
+        raise ExpressionError(
+            f"expression can't have more than {MAX_OPERATIONS} operations"
+        )
+    return Plan(expression, evaluate, frozenset(variables), operations)
+
+
+def _compile_node(node, variables, operations):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = node.value
+        if not math.isfinite(value):
+            raise ExpressionError(f"Number out of range: {ast.unparse(node)}")
+        return lambda values, handlers: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        variables.add(name)
+        return lambda values, handlers: values[name]
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = node.operand
+        if isinstance(node.op, ast.UAdd):
+            return _compile_node(operand, variables, operations)
+        if isinstance(operand, ast.Constant) and type(operand.value) in (int, float):
+            value = -operand.value
+            return lambda values, handlers: value
+        # a negated expression is a subtraction from zero
+        return _primitive(
+            "Subtraction",
+            lambda values, handlers: 0,
+            _compile_node(operand, variables, operations),
+            operations,
+        )
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATIONS:
+        return _primitive(
+            BINARY_OPERATIONS[type(node.op)],
+            _compile_node(node.left, variables, operations),
+            _compile_node(node.right, variables, operations),
+            operations,
+        )
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in FUNCTIONS
+        and len(node.args) == 1
+        and not node.keywords
+    ):
+        return _primitive(
+            FUNCTIONS[node.func.id],
+            _compile_node(node.args[0], variables, operations),
+            lambda values, handlers: 0,
+            operations,
+        )
+
+    raise ExpressionError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def _primitive(type, left, right, operations):
+    operations[type] += 1
+
+    def evaluate(values, handlers):
+        num1, num2 = left(values, handlers), right(values, handlers)
+        handler = handlers[type]
+        error = handler.validate(num1, num2)
+        if error:
+            raise ExpressionError(error)
+        try:
+            result = handler.evaluate(num1, num2)
+        except (ArithmeticError, ValueError, OperationError) as exception:
+            raise ExpressionError(f"{type}: {exception}")
+        if isinstance(result, float) and not math.isfinite(result):
+            raise ExpressionError(f"{type}: result out of range")
+        return result
+
+    return evaluate
+
+
+def validate_variables(plan: Plan, variables):
+    """An error message for `variables` that can't feed `plan`, or None."""
+    if variables is None:
+        variables = {}
+    if not isinstance(variables, dict):
+        return "variables must be an object"
+    missing = sorted(plan.variables - variables.keys())
+    if missing:
+        return f"Missing variables: {', '.join(missing)}"
+    for name in plan.variables:
+        value = variables[name]
+        if type(value) not in (int, float) or not math.isfinite(value):
+            return "variables must be integers or floats"
+    return None
+
+
+def expression_only(num1, num2):
+    return "Expression operations take an expression and its variables"
+
+
+expression = OperationHandler("Expression", lambda x, y: None, expression_only)
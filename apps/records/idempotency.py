@@ -0,0 +1,166 @@
+import asyncio
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# how often a duplicate checks whether the first request has finished
+POLL_INTERVAL = 0.05
+
+
+def cache_key(user_id, key: str) -> str:
+    return f"idempotency_{user_id}_{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def fingerprint(method: str, path: str, data) -> str:
+    # the parsed data rather than the body, which authentication may have
+    # consumed already; it also makes the key order irrelevant
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{method} {path}\n{payload}".encode()).hexdigest()
+
+
+def waiting(stored, claim, deadline):
+    """
+    What to answer while the key is held by `stored`: a (data, status,
+    headers) triple, or None to wait for the first request some more.
+    """
+    if stored["fingerprint"] != claim["fingerprint"]:
+        return (
+            {"error": f"{HEADER} was already used for another request"},
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            None,
+        )
+    if "status" in stored:
+        return stored["data"], stored["status"], {"Idempotent-Replayed": "true"}
+    if time.monotonic() >= deadline:
+        return (
+            {"error": f"A request with this {HEADER} is in progress"},
+            status.HTTP_409_CONFLICT,
+            None,
+        )
+    return None
+
+
+def invalid_key(key: str):
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return {"error": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"}
+    return None
+
+
+def idempotent(view):
+    """
+    Honour the `Idempotency-Key` header on a viewset action. The first
+    request with a key claims it in the cache with `cache.add` and runs the
+    view, and its response is stored under the key for
+    `IDEMPOTENCY_KEY_TTL` seconds. Repeats get the stored response back,
+    while the first one is still running they wait for it for up to
+    `IDEMPOTENCY_WAIT_TIMEOUT` seconds. A key reused with another request
+    body is refused. Only successful responses are stored: after an error,
+    e.g. an insufficient balance that a top up fixes, the key is released
+    and a retry runs the view again.
+    """
+
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(self, request, *args, **kwargs)
+        error = invalid_key(key)
+        if error:
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
+
+        name = cache_key(request.user.id, key)
+        claim = {"fingerprint": fingerprint(request.method, request.path, request.data)}
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while not cache.add(name, claim, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            stored = cache.get(name)
+            if stored is None:
+                # released between the add and the get, claim it again
+                continue
+            answer = waiting(stored, claim, deadline)
+            if answer is not None:
+                data, status_code, headers = answer
+                return Response(data, status=status_code, headers=headers)
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            response = view(self, request, *args, **kwargs)
+        except BaseException:
+            cache.delete(name)
+            raise
+        if not status.is_success(response.status_code):
+            cache.delete(name)
+        else:
+            cache.set(
+                name,
+                {**claim, "status": response.status_code, "data": response.data},
+                settings.IDEMPOTENCY_KEY_TTL,
+            )
+        return response
+
+    return wrapper
+
+
+def aidempotent(view):
+    """
+    `idempotent` for the async views, which take a plain `HttpRequest` and
+    answer with a `JsonResponse`. Same keys, so a key can't be replayed on
+    the other path either (the path is part of the fingerprint).
+    """
+
+    @functools.wraps(view)
+    async def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return await view(self, request, *args, **kwargs)
+        error = invalid_key(key)
+        if error:
+            return JsonResponse(error, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            data = request.body.decode("utf-8", "replace")
+        name = cache_key(request.user.id, key)
+        claim = {"fingerprint": fingerprint(request.method, request.path, data)}
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while not await cache.aadd(name, claim, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            stored = await cache.aget(name)
+            if stored is None:
+                continue
+            answer = waiting(stored, claim, deadline)
+            if answer is not None:
+                data, status_code, headers = answer
+                return JsonResponse(
+                    data, status=status_code, headers=headers, safe=False
+                )
+            await asyncio.sleep(POLL_INTERVAL)
+
+        try:
+            response = await view(self, request, *args, **kwargs)
+        except BaseException:
+            await cache.adelete(name)
+            raise
+        if not status.is_success(response.status_code):
+            await cache.adelete(name)
+        else:
+            await cache.aset(
+                name,
+                {
+                    **claim,
+                    "status": response.status_code,
+                    "data": json.loads(response.content),
+                },
+                settings.IDEMPOTENCY_KEY_TTL,
+            )
+        return response
+
+    return wrapper
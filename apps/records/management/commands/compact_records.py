@@ -0,0 +1,72 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.records.models import Record
+
+
+class Command(BaseCommand):
+    help = (
+        "Move soft deleted records, and optionally records older than a given "
+        "age, from the live record table to the archive table in small id "
+        "ordered batches, each in its own short transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Records moved per statement.",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            metavar="DAYS",
+            help="Also archive active records created more than DAYS days ago.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to wait between batches.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the records that would be archived without moving them.",
+        )
+
+    def handle(self, *args, batch_size, older_than, sleep, dry_run, **options):
+        cutoff = None
+        if older_than is not None:
+            cutoff = timezone.now() - datetime.timedelta(days=older_than)
+
+        if dry_run:
+            expired = Q(status=False)
+            if cutoff is not None:
+                expired |= Q(creation_date__lt=cutoff)
+            total = Record.objects.filter(expired).count()
+            self.stdout.write(f"records: would archive {total} rows")
+            return
+
+        start = time.monotonic()
+        total = 0
+        last = None
+        while True:
+            moved = Record.objects.archive(last, cutoff, batch_size)
+            if not moved:
+                break
+            total += len(moved)
+            last = moved[-1]
+            if sleep:
+                time.sleep(sleep)
+
+        elapsed = time.monotonic() - start
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            f"records: archived {total} rows in {elapsed:.2f}s ({rate:.0f} rows/s)"
+        )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.records.models import UsageSummary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the usage summary from the records. With --check, only "
+        "compare the stored summary with the computed one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Report the rows that differ instead of rebuilding.",
+        )
+
+    def handle(self, *args, check, **options):
+        if check:
+            differences = UsageSummary.objects.differences()
+            for user_id, operation_id, *values in differences:
+                stored, computed = values[:3], values[3:]
+                self.stdout.write(
+                    f"user {user_id} operation {operation_id}: "
+                    f"stored {tuple(stored)}, computed {tuple(computed)}"
+                )
+            if differences:
+                raise CommandError(
+                    f"{len(differences)} usage summary rows differ, rebuild it."
+                )
+            self.stdout.write("usage summary: up to date")
+            return
+
+        start = time.monotonic()
+        total = UsageSummary.objects.rebuild()
+        elapsed = time.monotonic() - start
+        self.stdout.write(f"usage summary: rebuilt {total} rows in {elapsed:.2f}s")
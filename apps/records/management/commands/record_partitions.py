@@ -0,0 +1,61 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.records import partitioning
+
+
+def month(value):
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise ValueError(f"{value!r} is not a YYYY-MM month")
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the monthly partitions of the record table ahead of time, and "
+        "detach the partitions of old months. Run it from a daily job so rows "
+        "never land in the default partition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=settings.RECORD_PARTITIONS_AHEAD,
+            help="Months after the current one to create partitions for.",
+        )
+        parser.add_argument(
+            "--detach-before",
+            type=month,
+            metavar="YYYY-MM",
+            help="Detach the partitions of the months before this one.",
+        )
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Partition the record table first if it isn't yet.",
+        )
+
+    def handle(self, *args, months_ahead, detach_before, convert, **options):
+        if not partitioning.is_supported():
+            raise CommandError("Record partitioning requires PostgreSQL.")
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not partitioning.is_partitioned(cursor):
+                if not convert:
+                    raise CommandError(
+                        "The record table is not partitioned, pass --convert "
+                        "or enable RECORD_PARTITIONING before migrating."
+                    )
+                partitioning.partition_table(cursor, months_ahead)
+                self.stdout.write("Partitioned the record table.")
+
+            for name in partitioning.ensure_partitions(cursor, months_ahead):
+                self.stdout.write(f"Created {name}.")
+            if detach_before:
+                for name in partitioning.detach_before(cursor, detach_before):
+                    self.stdout.write(f"Detached {name}.")
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 05:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(condition=models.Q(('status', True)), fields=['creation_date', 'id'], name='record_creation_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.7 on 2026-10-18 06:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0003_record_creation_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='record',
+            name='record_creation_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(condition=models.Q(('status', True)), fields=['user', '-creation_date', '-id'], name='record_user_active_idx'),
+        ),
+    ]
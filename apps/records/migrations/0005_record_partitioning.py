@@ -0,0 +1,33 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:25
+
+from django.conf import settings
+from django.db import migrations
+
+from apps.records import partitioning
+
+
+def partition_records(apps, schema_editor):
+    if not settings.RECORD_PARTITIONING or not partitioning.is_supported():
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if not partitioning.is_partitioned(cursor):
+            partitioning.partition_table(cursor, settings.RECORD_PARTITIONS_AHEAD)
+
+
+def unpartition_records(apps, schema_editor):
+    if not partitioning.is_supported():
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if partitioning.is_partitioned(cursor):
+            partitioning.unpartition_table(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0004_record_user_active_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_records, unpartition_records),
+    ]
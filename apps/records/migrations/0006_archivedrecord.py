@@ -0,0 +1,58 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("records", "0005_record_partitioning"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedRecord",
+            fields=[
+                (
+                    "creation_date",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Creation date"
+                    ),
+                ),
+                ("status", models.BooleanField(default=True, verbose_name="Status")),
+                ("amount", models.IntegerField(verbose_name="Amount")),
+                ("user_balance", models.IntegerField(verbose_name="User balance")),
+                (
+                    "operation_response",
+                    models.CharField(max_length=15, verbose_name="Operation Response"),
+                ),
+                ("id", models.IntegerField(primary_key=True, serialize=False)),
+                (
+                    "archive_date",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Archive date"
+                    ),
+                ),
+                (
+                    "operation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="records.operation",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Archived record",
+                "verbose_name_plural": "Archived records",
+            },
+        ),
+    ]
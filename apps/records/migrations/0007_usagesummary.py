@@ -0,0 +1,44 @@
+# Generated by Django 4.1.7 on 2026-10-18 11:05
+
+import apps.records.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_usage_summary(apps, schema_editor):
+    apps.get_model('records', 'UsageSummary').objects.rebuild()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('records', '0006_archivedrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0, verbose_name='Calculations')),
+                ('credits', models.BigIntegerField(default=0, verbose_name='Credits spent')),
+                ('last_activity', models.DateTimeField(null=True, verbose_name='Last activity')),
+                ('operation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='records.operation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Usage summary',
+                'verbose_name_plural': 'Usage summaries',
+            },
+            managers=[
+                ('objects', apps.records.models.UsageSummaryManager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='usagesummary',
+            constraint=models.UniqueConstraint(fields=('user', 'operation'), name='usage_summary_user_operation'),
+        ),
+        migrations.RunPython(build_usage_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:05
+
+from django.db import migrations
+
+
+def create_expression_operation(apps, schema_editor):
+    # an expression is charged the costs of the operations it uses, the
+    # cost of its own row isn't used
+    Operation = apps.get_model('records', 'Operation')
+    if not Operation.objects.filter(type='Expression').exists():
+        Operation.objects.create(type='Expression', cost=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0007_usagesummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_expression_operation, migrations.RunPython.noop),
+    ]
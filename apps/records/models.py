@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.utils import timezone
 
 from apps.users.models import User
 
@@ -30,7 +31,220 @@ class Operation(BaseModel):
         return f"{self.type} cost is {self.cost}"
 
 
-class Record(BaseModel):
+class RecordManager(models.Manager):
+    def debit_and_create(
+        self, user_id: int, operation, operation_response, cost: int = None
+    ):
+        """
+        Debit the operation cost, or `cost` when given, from the user and
+        insert the record in a single statement. The debit only applies while
+        the balance covers the cost, so concurrent calls can't overdraw or
+        lose updates. Returns the new record, or None when the balance is
+        insufficient.
+        """
+        if cost is None:
+            cost = operation.cost
+        creation_date = timezone.now()
+        operation_response = str(operation_response)
+        usage = UsageSummary.objects.upsert_sql(
+            "SELECT %s, %s, 1, %s, %s::timestamptz FROM debit"
+        )
+        sql = f"""
+            WITH debit AS (
+                UPDATE {User._meta.db_table}
+                SET balance = balance - %s
+                WHERE id = %s AND balance >= %s
+                RETURNING balance
+            ), usage AS (
+                {usage}
+            )
+            INSERT INTO {self.model._meta.db_table}
+                (creation_date, status, amount, user_balance,
+                 operation_response, operation_id, user_id)
+            SELECT %s, true, %s, debit.balance, %s, %s, %s FROM debit
+            RETURNING id, user_balance
+        """
+        params = [
+            cost,
+            user_id,
+            cost,
+            user_id,
+            operation.id,
+            cost,
+            creation_date,
+            creation_date,
+            cost,
+            operation_response,
+            operation.id,
+            user_id,
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+
+        record_id, user_balance = row
+        record = self.model(
+            id=record_id,
+            creation_date=creation_date,
+            operation=operation,
+            user_id=user_id,
+            amount=cost,
+            user_balance=user_balance,
+            operation_response=operation_response,
+        )
+        record._state.adding = False
+        return record
+
+    def bulk_debit_and_create(self, user_id: int, entries):
+        """
+        Debit the total cost of `entries`, a list of (operation, response)
+        pairs, once and bulk insert their records. Each record carries the
+        running balance after its own debit. Returns the final balance, or
+        None when the balance doesn't cover the total.
+        """
+        total = sum(operation.cost for operation, _ in entries)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {User._meta.db_table}
+                    SET balance = balance - %s
+                    WHERE id = %s AND balance >= %s
+                    RETURNING balance
+                    """,
+                    [total, user_id, total],
+                )
+                row = cursor.fetchone()
+            if row is None:
+                return None
+
+            user_balance = row[0] + total
+            records = []
+            for operation, operation_response in entries:
+                user_balance -= operation.cost
+                records.append(
+                    self.model(
+                        operation=operation,
+                        user_id=user_id,
+                        amount=operation.cost,
+                        user_balance=user_balance,
+                        operation_response=str(operation_response),
+                    )
+                )
+            self.bulk_create(records)
+            UsageSummary.objects.apply(
+                (user_id, operation.id, 1, operation.cost, record.creation_date)
+                for (operation, _), record in zip(entries, records)
+            )
+        return row[0]
+
+    def soft_delete(self, user_id: int, queryset) -> int:
+        """
+        Soft delete the active records of `queryset`, all owned by `user_id`,
+        in one statement that also takes them out of the usage summary and
+        bumps the user's deletion counter. Returns how many were deleted.
+        """
+        table = self.model._meta.db_table
+        records, params = queryset.values("id").query.sql_with_params()
+        usage = UsageSummary.objects.upsert_sql(
+            "SELECT %s, operation_id, -count(*), -sum(amount), NULL::timestamptz "
+            "FROM deleted GROUP BY operation_id"
+        )
+        sql = f"""
+            WITH deleted AS (
+                UPDATE {table} SET status = false
+                WHERE status AND id IN ({records})
+                RETURNING operation_id, amount
+            ), usage AS (
+                {usage}
+            ), bump AS (
+                UPDATE {User._meta.db_table}
+                SET record_deletions = record_deletions + 1
+                WHERE id = %s AND EXISTS (SELECT 1 FROM deleted)
+            )
+            SELECT count(*) FROM deleted
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*params, user_id, user_id])
+            return cursor.fetchone()[0]
+
+    def archive(self, after, older_than, batch_size: int):
+        """
+        Move the next `batch_size` records with an id above `after` that are
+        soft deleted, or created before `older_than` when it's given, to the
+        archive table in a single statement. Active users whose records were
+        archived get their deletion counter bumped, as their list changed.
+        Returns the ids moved.
+        """
+        table = self.model._meta.db_table
+        archive = ArchivedRecord._meta.db_table
+        columns = (
+            "id, creation_date, status, amount, user_balance, "
+            "operation_response, operation_id, user_id"
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH batch AS (
+                    SELECT id FROM {table}
+                    WHERE (%s::integer IS NULL OR id > %s)
+                    AND (NOT status OR creation_date < %s)
+                    ORDER BY id
+                    LIMIT %s
+                ), moved AS (
+                    DELETE FROM {table} AS record USING batch
+                    WHERE record.id = batch.id
+                    RETURNING record.*
+                )
+                INSERT INTO {archive} ({columns}, archive_date)
+                SELECT {columns}, %s FROM moved
+                RETURNING id, user_id, status, operation_id, amount
+                """,
+                [after, after, older_than, batch_size, timezone.now()],
+            )
+            rows = cursor.fetchall()
+            active = [row for row in rows if row[2]]
+            if active:
+                User.objects.filter(id__in={row[1] for row in active}).update(
+                    record_deletions=models.F("record_deletions") + 1
+                )
+                UsageSummary.objects.apply(
+                    (user_id, operation_id, -1, -amount, None)
+                    for _, user_id, _, operation_id, amount in active
+                )
+        return sorted(row[0] for row in rows)
+
+    def list_version(self, user_id: int):
+        """
+        A cheap version of the user's active record list: the user's deletion
+        counter and the highest id among their active records, read in one
+        query that only probes `record_user_active_idx`.
+        """
+        return self.list_version_query(user_id).get()
+
+    async def alist_version(self, user_id: int):
+        return await self.list_version_query(user_id).aget()
+
+    def list_version_query(self, user_id: int):
+        # ids come from one sequence, unlike creation_date which is set by
+        # whichever app server saved the record and can go back with clock skew
+        newest = (
+            self.filter(user=models.OuterRef("pk"), status=True)
+            .order_by()
+            .values("user")
+            .annotate(newest=models.Max("id"))
+            .values("newest")
+        )
+        return (
+            User.objects.filter(pk=user_id)
+            .annotate(newest_record=models.Subquery(newest))
+            .values_list("record_deletions", "newest_record")
+        )
+
+
+class AbstractRecord(BaseModel):
     operation = models.ForeignKey(Operation, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.IntegerField(verbose_name="Amount", blank=False, null=False)
@@ -42,8 +256,178 @@ class Record(BaseModel):
     )
 
     class Meta:
-        verbose_name = "Record"
-        verbose_name_plural = "Records"
+        abstract = True
 
     def __str__(self) -> str:
         return f"User balance is {self.user_balance}"
+
+
+class Record(AbstractRecord):
+    objects = RecordManager()
+
+    class Meta:
+        verbose_name = "Record"
+        verbose_name_plural = "Records"
+        indexes = [
+            models.Index(
+                fields=["user", "-creation_date", "-id"],
+                name="record_user_active_idx",
+                condition=models.Q(status=True),
+            ),
+        ]
+
+
+class ArchivedRecord(AbstractRecord):
+    """
+    A record moved out of the live table by `compact_records`. It keeps the
+    id it had there.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    archive_date = models.DateTimeField(
+        verbose_name="Archive date", auto_now=False, auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = "Archived record"
+        verbose_name_plural = "Archived records"
+
+
+class UsageSummaryManager(models.Manager):
+    use_in_migrations = True
+
+    def upsert_sql(self, select: str) -> str:
+        """
+        An INSERT adding the (user_id, operation_id, count, credits,
+        last_activity) rows of `select` to the summary, for use in a CTE.
+        """
+        table = self.model._meta.db_table
+        return f"""
+            INSERT INTO {table}
+                (user_id, operation_id, count, credits, last_activity)
+            {select}
+            ON CONFLICT (user_id, operation_id) DO UPDATE SET
+                count = {table}.count + EXCLUDED.count,
+                credits = {table}.credits + EXCLUDED.credits,
+                last_activity = GREATEST(
+                    {table}.last_activity, EXCLUDED.last_activity
+                )
+        """
+
+    def apply(self, changes):
+        """
+        Add (user_id, operation_id, count, credits, last_activity) changes
+        to the summary with one statement.
+        """
+        totals = {}
+        for user_id, operation_id, count, credits, last_activity in changes:
+            total = totals.setdefault(
+                (user_id, operation_id), [user_id, operation_id, 0, 0, None]
+            )
+            total[2] += count
+            total[3] += credits
+            if last_activity is not None and (
+                total[4] is None or last_activity > total[4]
+            ):
+                total[4] = last_activity
+        if not totals:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.upsert_sql(
+                    "SELECT * FROM unnest("
+                    "%s::integer[], %s::integer[], %s::integer[], "
+                    "%s::bigint[], %s::timestamptz[])"
+                ),
+                [list(column) for column in zip(*totals.values())],
+            )
+
+    def computed_sql(self) -> str:
+        """
+        The summary computed from scratch: counts and credits of the active
+        records, last activity across live and archived ones.
+        """
+        Record = self.model._meta.apps.get_model("records", "Record")
+        ArchivedRecord = self.model._meta.apps.get_model("records", "ArchivedRecord")
+        return f"""
+            SELECT user_id, operation_id,
+                count(*) FILTER (WHERE live AND status),
+                COALESCE(sum(amount) FILTER (WHERE live AND status), 0),
+                max(creation_date)
+            FROM (
+                SELECT user_id, operation_id, status, amount, creation_date,
+                    true AS live
+                FROM {Record._meta.db_table}
+                UNION ALL
+                SELECT user_id, operation_id, status, amount, creation_date,
+                    false
+                FROM {ArchivedRecord._meta.db_table}
+            ) records
+            GROUP BY user_id, operation_id
+        """
+
+    def rebuild(self) -> int:
+        """Replace the whole summary with one computed from the records."""
+        table = self.model._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"""
+                INSERT INTO {table}
+                    (user_id, operation_id, count, credits, last_activity)
+                {self.computed_sql()}
+                """
+            )
+            return cursor.rowcount
+
+    def differences(self):
+        """
+        The (user_id, operation_id) pairs where the stored summary doesn't
+        match the computed one, with both versions of the row.
+        """
+        table = self.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH computed (user_id, operation_id, count, credits,
+                               last_activity) AS ({self.computed_sql()})
+                SELECT
+                    COALESCE(stored.user_id, computed.user_id),
+                    COALESCE(stored.operation_id, computed.operation_id),
+                    stored.count, stored.credits, stored.last_activity,
+                    computed.count, computed.credits, computed.last_activity
+                FROM {table} stored
+                FULL OUTER JOIN computed
+                    ON computed.user_id = stored.user_id
+                    AND computed.operation_id = stored.operation_id
+                WHERE (stored.count, stored.credits, stored.last_activity)
+                    IS DISTINCT FROM
+                    (computed.count, computed.credits, computed.last_activity)
+                ORDER BY 1, 2
+                """
+            )
+            return cursor.fetchall()
+
+
+class UsageSummary(models.Model):
+    """
+    Per user and operation totals of the active records, kept up to date in
+    the statements that insert and soft delete records.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="usage")
+    operation = models.ForeignKey(Operation, on_delete=models.CASCADE)
+    count = models.IntegerField(verbose_name="Calculations", default=0)
+    credits = models.BigIntegerField(verbose_name="Credits spent", default=0)
+    last_activity = models.DateTimeField(verbose_name="Last activity", null=True)
+    objects = UsageSummaryManager()
+
+    class Meta:
+        verbose_name = "Usage summary"
+        verbose_name_plural = "Usage summaries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "operation"], name="usage_summary_user_operation"
+            ),
+        ]
@@ -0,0 +1,173 @@
+import math
+import threading
+
+from asgiref.sync import sync_to_async
+from django.utils.module_loading import import_string
+
+from . import providers
+
+
+class OperationError(Exception):
+    """
+    Raised by `evaluate` for inputs that turn out to be invalid only once
+    evaluated. The message goes back to the client like a `validate` error.
+    """
+
+
+class OperationHandler:
+    """
+    How an operation type is evaluated. `validate` returns an error message
+    for inputs the operation can't take, or None. Operations that wait on I/O
+    can pass a coroutine function as `async_evaluate` for the async views.
+    """
+
+    def __init__(self, type: str, evaluate, validate=None, async_evaluate=None):
+        self.type = type
+        self.evaluate = evaluate
+        self.validate = validate or (lambda num1, num2: None)
+        self.async_evaluate = async_evaluate
+
+    async def aevaluate(self, num1, num2):
+        if self.async_evaluate is not None:
+            return await self.async_evaluate(num1, num2)
+        return self.evaluate(num1, num2)
+
+
+class OperationEntry:
+    """An `Operation` row bound to its handler, what the hot path looks up."""
+
+    def __init__(self, operation, handler):
+        self.operation = operation
+        self.handler = handler
+        self.id = operation.id
+        self.type = operation.type
+        self.cost = operation.cost
+
+
+class OperationRegistry:
+    """
+    Handlers are registered by operation type when the app is ready. They are
+    bound to the `Operation` rows by id on first use (the database can't be
+    queried during app loading) and the binding is dropped whenever an
+    operation is saved or deleted.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.entries = None
+        self._lock = threading.Lock()
+
+    def build(self, handler_paths):
+        self.handlers = {}
+        for path in handler_paths:
+            self.register(import_string(path))
+
+    def register(self, handler: OperationHandler):
+        self.handlers[handler.type] = handler
+        self.reset()
+
+    def reset(self):
+        self.entries = None
+
+    def get(self, operation_id):
+        try:
+            operation_id = int(operation_id)
+        except (TypeError, ValueError):
+            return None
+        entries = self.entries
+        if entries is None:
+            entries = self.load()
+        return entries.get(operation_id)
+
+    async def aget(self, operation_id):
+        if self.entries is None:
+            await sync_to_async(self.load)()
+        return self.get(operation_id)
+
+    def load(self):
+        from .models import Operation
+
+        with self._lock:
+            if self.entries is None:
+                self.entries = {
+                    operation.id: OperationEntry(
+                        operation, self.handlers.get(operation.type)
+                    )
+                    for operation in Operation.objects.all()
+                }
+            return self.entries
+
+    def costs(self):
+        """The cost of each supported operation type."""
+        entries = self.entries
+        if entries is None:
+            entries = self.load()
+        return {
+            entry.type: entry.cost
+            for entry in entries.values()
+            if entry.handler is not None
+        }
+
+    def scalar_operations(self):
+        return {
+            operation_type: handler.evaluate
+            for operation_type, handler in self.handlers.items()
+        }
+
+
+registry = OperationRegistry()
+
+
+def integers_only(num1, num2):
+    if not isinstance(num1, int) or not isinstance(num2, int):
+        return "For random string, num1 and num2 must be integers"
+    if not 1 <= num1 <= providers.MAX_STRINGS:
+        return f"For random string, num1 must be between 1 and {providers.MAX_STRINGS}"
+    if not 1 <= num2 <= providers.MAX_STRING_LENGTH:
+        return (
+            "For random string, num2 must be between 1 and "
+            f"{providers.MAX_STRING_LENGTH}"
+        )
+    return None
+
+
+def get_random_string(num_strings, string_length):
+    try:
+        return providers.get_provider().get_random_string(num_strings, string_length)
+    except providers.RandomStringRequestError as error:
+        raise OperationError(str(error)) from error
+
+
+async def aget_random_string(num_strings, string_length):
+    provider = providers.get_provider()
+    try:
+        return await provider.aget_random_string(num_strings, string_length)
+    except providers.RandomStringRequestError as error:
+        raise OperationError(str(error)) from error
+
+
+def non_zero_divisor(num1, num2):
+    if num2 == 0:
+        return "Division by zero not allowed"
+    return None
+
+
+def non_negative(num1, num2):
+    if num1 < 0:
+        return "Square root of a negative number not allowed"
+    return None
+
+
+addition = OperationHandler("Addition", lambda x, y: x + y)
+subtraction = OperationHandler("Subtraction", lambda x, y: x - y)
+multiplication = OperationHandler("Multiplication", lambda x, y: x * y)
+division = OperationHandler("Division", lambda x, y: x / y, non_zero_divisor)
+square_root = OperationHandler(
+    "Square root", lambda x, y: round(math.sqrt(x), 2), non_negative
+)
+random_string = OperationHandler(
+    "Random string",
+    get_random_string,
+    integers_only,
+    async_evaluate=aget_random_string,
+)
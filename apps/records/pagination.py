@@ -0,0 +1,139 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class RecordCursorPagination(BasePagination):
+    """
+    Keyset pagination over (creation_date, id) in descending order.
+
+    Each page is fetched with a `WHERE (creation_date, id) < (..)` bound plus
+    `LIMIT page_size + 1`, so the cost of a page does not depend on how deep
+    the client has scrolled, unlike OFFSET based pagination.
+
+    DRF's `CursorPagination` is not used on purpose: its cursor is a position
+    on the first ordering field plus an offset over the rows sharing that
+    value, so it is not a true composite keyset and degrades to offset scans
+    when many records share a `creation_date`.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = None
+    max_page_size = 100
+    max_cursor_id = 2**31 - 1
+    invalid_cursor_message = "Invalid cursor"
+
+    def is_requested(self, request):
+        """The cursor mode is opt-in, so plain list calls keep their response."""
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor["r"])
+
+        if cursor is not None:
+            creation_date = datetime.fromisoformat(cursor["d"])
+            if self.reverse:
+                bound = Q(creation_date__gt=creation_date) | Q(
+                    creation_date=creation_date, id__gt=cursor["i"]
+                )
+            else:
+                bound = Q(creation_date__lt=creation_date) | Q(
+                    creation_date=creation_date, id__lt=cursor["i"]
+                )
+            queryset = queryset.filter(bound)
+
+        ordering = ("creation_date", "id") if self.reverse else ("-creation_date", "-id")
+        results = list(queryset.order_by(*ordering)[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        default_page_size = self.page_size or api_settings.PAGE_SIZE
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return default_page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            creation_date = datetime.fromisoformat(cursor["d"])
+            cursor["i"] = int(cursor["i"])
+            cursor["r"] = bool(cursor.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if creation_date.tzinfo is not None:
+            raise NotFound(self.invalid_cursor_message)
+        if not 0 < cursor["i"] <= self.max_cursor_id:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, record, reverse):
+        payload = {"d": record.creation_date.isoformat(), "i": record.id}
+        if reverse:
+            payload["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,215 @@
+"""
+Monthly range partitioning of the record ledger on `creation_date`.
+
+The layout is optional (`RECORD_PARTITIONING`) and PostgreSQL only. Once the
+table is partitioned, date bounded queries are pruned to the months they
+cover, and an old month leaves the table with a metadata only DETACH.
+"""
+import datetime
+import re
+
+from django.db import connection
+
+PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def table_name() -> str:
+    from .models import Record
+
+    return Record._meta.db_table
+
+
+def month_start(value) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{table_name()}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)",
+        [table_name()],
+    )
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def partitions(cursor):
+    """The (name, month) of every monthly partition, oldest first."""
+    cursor.execute(
+        """
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        """,
+        [table_name()],
+    )
+    months = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.search(name)
+        if match:
+            year, month = map(int, match.groups())
+            months.append((name, datetime.date(year, month, 1)))
+    return sorted(months, key=lambda partition: partition[1])
+
+
+def create_partition(cursor, month: datetime.date) -> bool:
+    """Create the partition for `month`. Returns False if it already exists."""
+    name = partition_name(month)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    if cursor.fetchone()[0]:
+        return False
+    cursor.execute(
+        f"""
+        CREATE TABLE {name} PARTITION OF {table_name()}
+        FOR VALUES FROM (%s) TO (%s)
+        """,
+        [month, add_months(month, 1)],
+    )
+    return True
+
+
+def ensure_partitions(cursor, months_ahead: int, today=None):
+    """Create the partitions from this month to `months_ahead` months ahead."""
+    first = month_start(today or datetime.date.today())
+    return [
+        partition_name(month)
+        for month in (add_months(first, offset) for offset in range(months_ahead + 1))
+        if create_partition(cursor, month)
+    ]
+
+
+def detach_before(cursor, month: datetime.date):
+    """
+    Detach the partitions of the months before `month`. Each one becomes a
+    standalone table, to archive or drop, without touching its rows.
+    """
+    detached = []
+    for name, partition_month in partitions(cursor):
+        if partition_month < month:
+            cursor.execute(f"ALTER TABLE {table_name()} DETACH PARTITION {name}")
+            # the id default would tie the table to the ledger's sequence
+            cursor.execute(f"ALTER TABLE {name} ALTER COLUMN id DROP DEFAULT")
+            detached.append(name)
+    return detached
+
+
+def _table_definitions(cursor, table):
+    """Foreign keys and indexes of `table` besides its primary key."""
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype = 'f'
+        """,
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT indexdef FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = %s
+        AND indexname NOT IN (
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u')
+        )
+        """,
+        [table, table],
+    )
+    # partitioned indexes are listed as ON ONLY, which would not recurse
+    indexes = [
+        definition.replace(" ON ONLY ", " ON ") for definition, in cursor.fetchall()
+    ]
+    return foreign_keys, indexes
+
+
+def _restore_definitions(cursor, table, primary_key, foreign_keys, indexes):
+    cursor.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})"
+    )
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    for definition in indexes:
+        cursor.execute(definition)
+
+
+def partition_table(cursor, months_ahead: int):
+    """
+    Rebuild the record table as a partitioned table: one partition per month
+    from the oldest record to `months_ahead` months ahead, plus a default
+    partition for anything outside them. Rows are copied, so this holds an
+    exclusive lock for as long as the copy takes; run it in a maintenance
+    window on large tables.
+
+    The primary key becomes (id, creation_date), as PostgreSQL requires the
+    partition key in unique constraints, and ids come from an owned sequence
+    since partitioned tables can't have identity columns.
+    """
+    table = table_name()
+    previous = f"{table}_unpartitioned"
+    # deferred foreign key checks pending on the table would block the ALTERs
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    foreign_keys, indexes = _table_definitions(cursor, table)
+    cursor.execute(f"SELECT min(creation_date), max(id) FROM {table}")
+    oldest, max_id = cursor.fetchone()
+
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {previous}")
+    cursor.execute(
+        f"""
+        CREATE TABLE {table} (LIKE {previous} INCLUDING DEFAULTS)
+        PARTITION BY RANGE (creation_date)
+        """
+    )
+    month = month_start(oldest or datetime.date.today())
+    last = add_months(month_start(datetime.date.today()), months_ahead)
+    while month <= last:
+        create_partition(cursor, month)
+        month = add_months(month, 1)
+    cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {previous}")
+    cursor.execute(f"DROP TABLE {previous}")
+
+    _restore_definitions(cursor, table, "id, creation_date", foreign_keys, indexes)
+    cursor.execute(f"CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    cursor.execute(
+        f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')"
+    )
+    if max_id:
+        cursor.execute(f"SELECT setval('{table}_id_seq', %s)", [max_id])
+
+
+def unpartition_table(cursor):
+    """
+    Rebuild the record table as a plain table. Detached months are left as
+    they are, only the rows still attached are copied.
+    """
+    table = table_name()
+    previous = f"{table}_partitioned"
+    # deferred foreign key checks pending on the table would block the ALTERs
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    foreign_keys, indexes = _table_definitions(cursor, table)
+    cursor.execute(f"SELECT max(id) FROM {table}")
+    (max_id,) = cursor.fetchone()
+
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {previous}")
+    cursor.execute(f"CREATE TABLE {table} (LIKE {previous})")
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {previous}")
+    cursor.execute(f"DROP TABLE {previous}")
+
+    _restore_definitions(cursor, table, "id", foreign_keys, indexes)
+    cursor.execute(
+        f"""
+        ALTER TABLE {table} ALTER COLUMN id
+        ADD GENERATED BY DEFAULT AS IDENTITY (START WITH {(max_id or 0) + 1})
+        """
+    )
+
+
+def is_supported() -> bool:
+    return connection.vendor == "postgresql"
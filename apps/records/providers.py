@@ -0,0 +1,272 @@
+import secrets
+import string
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# random.org's limits on the number of strings and their length, requests
+# outside them are answered with a 400.
+MAX_STRINGS = 10000
+MAX_STRING_LENGTH = 32
+
+
+class RandomStringProviderError(Exception):
+    pass
+
+
+class RandomStringRequestError(Exception):
+    """The parameters can't be served, by any provider: the client's error."""
+
+
+class LocalRandomStringProvider:
+    """Generates the strings in process with the `secrets` module."""
+
+    alphabet = string.ascii_letters + string.digits
+
+    def get_random_string(self, num_strings: int, string_length: int) -> str:
+        strings = self.generate(num_strings, string_length)
+        return "".join(f"{value}\n" for value in strings)
+
+    async def aget_random_string(self, num_strings: int, string_length: int) -> str:
+        return self.get_random_string(num_strings, string_length)
+
+    def generate(self, num_strings: int, string_length: int):
+        # the strings are unique, past this many the loop below never ends
+        if num_strings > len(self.alphabet) ** string_length:
+            raise RandomStringRequestError(
+                f"Only {len(self.alphabet) ** max(string_length, 0)} unique strings"
+                f" of length {string_length} exist"
+            )
+        strings = set()
+        while len(strings) < num_strings:
+            strings.add(
+                "".join(secrets.choice(self.alphabet) for _ in range(string_length))
+            )
+        return list(strings)
+
+
+class StaticRandomStringProvider:
+    """Stand-in provider for tests, always answers with `value`."""
+
+    def __init__(self, value: str = "randomstring"):
+        self.value = value
+        self.calls = []
+
+    def get_random_string(self, num_strings: int, string_length: int) -> str:
+        self.calls.append((num_strings, string_length))
+        return self.value
+
+    async def aget_random_string(self, num_strings: int, string_length: int) -> str:
+        return self.get_random_string(num_strings, string_length)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and lets a single
+    trial call through once `reset_timeout` seconds have passed.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # half open: the next result decides whether it closes again
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RandomOrgProvider:
+    """
+    random.org client over a keep-alive session with strict timeouts and a
+    circuit breaker. Strings of each length are prefetched into a buffer that
+    is refilled in the background, so most calls don't touch the network.
+    When random.org can't answer, the local generator is used instead.
+
+    The async methods go through an `httpx.AsyncClient`, so requests waiting
+    on random.org don't hold a worker thread. The client lives for one call:
+    its connections are bound to the event loop that opened them, and a
+    client kept past its loop can no longer be closed.
+    """
+
+    url = "https://www.random.org/strings/"
+
+    def __init__(
+        self,
+        connect_timeout: float = 2,
+        read_timeout: float = 3,
+        buffer_size: int = 100,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30,
+        fallback: str = "apps.records.providers.LocalRandomStringProvider",
+        url: str = None,
+    ):
+        if url:
+            self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.buffer_size = buffer_size
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.fallback = import_string(fallback)()
+        # requests and httpx are imported on first use, they are a sizeable
+        # part of the app's import time and most processes never need them
+        import requests
+
+        self.session = requests.Session()
+        self.buffers = defaultdict(deque)
+        self.refilling = set()
+        self._lock = threading.Lock()
+
+    def get_random_string(self, num_strings: int, string_length: int) -> str:
+        strings = self.take(num_strings, string_length)
+        if strings is None:
+            try:
+                strings = self.fetch(num_strings, string_length)
+            except RandomStringProviderError:
+                return self.fallback.get_random_string(num_strings, string_length)
+        return "".join(f"{value}\n" for value in strings)
+
+    async def aget_random_string(self, num_strings: int, string_length: int) -> str:
+        strings = self.take(num_strings, string_length)
+        if strings is None:
+            try:
+                strings = await self.afetch(num_strings, string_length)
+            except RandomStringProviderError:
+                return await self.fallback.aget_random_string(
+                    num_strings, string_length
+                )
+        return "".join(f"{value}\n" for value in strings)
+
+    def take(self, num_strings: int, string_length: int):
+        with self._lock:
+            buffer = self.buffers[string_length]
+            strings = None
+            if len(buffer) >= num_strings:
+                strings = [buffer.popleft() for _ in range(num_strings)]
+            if len(buffer) < self.buffer_size // 2:
+                self.schedule_refill(string_length)
+        return strings
+
+    def schedule_refill(self, string_length: int):
+        if not self.buffer_size or string_length in self.refilling:
+            return
+        self.refilling.add(string_length)
+        threading.Thread(target=self.refill, args=(string_length,), daemon=True).start()
+
+    def refill(self, string_length: int):
+        try:
+            strings = self.fetch(self.buffer_size, string_length)
+        except (RandomStringProviderError, RandomStringRequestError):
+            strings = []
+        with self._lock:
+            self.buffers[string_length].extend(strings)
+            self.refilling.discard(string_length)
+
+    def fetch(self, num_strings: int, string_length: int):
+        import requests
+
+        if not self.breaker.allow():
+            raise RandomStringProviderError("random.org circuit is open")
+        try:
+            response = self.session.get(
+                self.url,
+                params=self.params(num_strings, string_length),
+                timeout=self.timeout,
+            )
+            self.check_status(response.status_code, response.text)
+        except requests.RequestException as error:
+            self.breaker.record_failure()
+            raise RandomStringProviderError(str(error)) from error
+        self.breaker.record_success()
+        return response.text.split()
+
+    async def afetch(self, num_strings: int, string_length: int):
+        import httpx
+
+        if not self.breaker.allow():
+            raise RandomStringProviderError("random.org circuit is open")
+        try:
+            async with self.async_client() as client:
+                response = await client.get(
+                    self.url, params=self.params(num_strings, string_length)
+                )
+            self.check_status(response.status_code, response.text)
+        except httpx.HTTPError as error:
+            self.breaker.record_failure()
+            raise RandomStringProviderError(str(error)) from error
+        self.breaker.record_success()
+        return response.text.split()
+
+    def check_status(self, status_code: int, text: str):
+        """
+        A 4xx means random.org refused the parameters, which it would do
+        every time, so the error goes back to the client and, as random.org
+        did answer, it doesn't count against the breaker. 5xx are failures.
+        """
+        if 400 <= status_code < 500:
+            self.breaker.record_success()
+            raise RandomStringRequestError(text.strip() or f"HTTP {status_code}")
+        if status_code >= 500:
+            self.breaker.record_failure()
+            raise RandomStringProviderError(f"random.org answered {status_code}")
+
+    def async_client(self):
+        import httpx
+
+        connect_timeout, read_timeout = self.timeout
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+        )
+
+    def params(self, num_strings: int, string_length: int):
+        return {
+            "num": num_strings,
+            "len": string_length,
+            "digits": "on",
+            "upperalpha": "on",
+            "loweralpha": "on",
+            "unique": "on",
+            "format": "plain",
+            "rnd": "new",
+        }
+
+
+_provider = None
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        config = settings.RANDOM_STRING_PROVIDER
+        _provider = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+    return _provider
+
+
+@receiver(setting_changed)
+def reset_provider(setting, **kwargs):
+    global _provider
+    if setting == "RANDOM_STRING_PROVIDER":
+        _provider = None
@@ -1,9 +1,13 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import AsyncRecordView
 from .views import RecordViewset, OperationViewset
 
 router = DefaultRouter()
 
 router.register(r"record", RecordViewset, basename="record")
 router.register(r"operation", OperationViewset, basename="operation")
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("async/record/", AsyncRecordView.as_view(), name="async-record"),
+]
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .catalog import catalog
+from .models import Operation
+from .operations import registry
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_user(sender, instance, **kwargs):
+    cache.invalidate(cache.user_key(instance.username))
+
+
+@receiver([post_save, post_delete], sender=Operation)
+def reset_operation_caches(sender, instance, **kwargs):
+    registry.reset()
+    catalog.reset()
@@ -0,0 +1,132 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+
+def take(state, cost: float, capacity: float, rate: float, now: float):
+    """
+    One token bucket check. `state` is the (tokens, updated) pair stored for
+    the bucket, or None for a new, full bucket. Returns the new state and
+    how long to wait before `cost` tokens are available, 0 when they were
+    taken. A cost above the capacity is taken from a full bucket and leaves
+    it in debt, the tokens go below 0 and refill from there.
+    """
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    needed = min(cost, capacity)
+    if tokens >= needed:
+        return (tokens - cost, now), 0.0
+    return (tokens, now), (needed - tokens) / rate
+
+
+class LocalMemoryBuckets:
+    """Buckets in a dict of this process, updated under a lock."""
+
+    def __init__(self):
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost, capacity, rate) -> float:
+        with self._lock:
+            self.buckets[key], wait = take(
+                self.buckets.get(key), cost, capacity, rate, time.monotonic()
+            )
+        return wait
+
+
+class CacheBuckets:
+    """
+    Buckets in a Django cache shared by the fleet. Each update holds a short
+    per bucket lock taken with `cache.add`, which is atomic on the shared
+    backends (Redis, Memcached, database). A request that can't get the lock
+    within `lock_wait` seconds is throttled.
+    """
+
+    def __init__(
+        self, alias: str = "default", lock_timeout: float = 1, lock_wait: float = 0.1
+    ):
+        self.cache = caches[alias]
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+
+    def take(self, key: str, cost, capacity, rate) -> float:
+        lock = f"{key}_lock"
+        deadline = time.monotonic() + self.lock_wait
+        while not self.cache.add(lock, 1, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                return 1 / rate
+            time.sleep(0.005)
+        try:
+            state, wait = take(self.cache.get(key), cost, capacity, rate, time.time())
+            # an untouched bucket is full again once it has had time to refill
+            self.cache.set(key, state, int((capacity - state[0]) / rate) + 1)
+        finally:
+            self.cache.delete(lock)
+        return wait
+
+
+_buckets = None
+
+
+def get_buckets():
+    global _buckets
+    if _buckets is None:
+        config = settings.RECORDS_THROTTLE
+        _buckets = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+    return _buckets
+
+
+@receiver(setting_changed)
+def reset_buckets(setting=None, **kwargs):
+    global _buckets
+    if setting in (None, "RECORDS_THROTTLE"):
+        _buckets = None
+
+
+class OperationRateThrottle(BaseThrottle):
+    """
+    Per user token bucket. Buckets hold up to `CAPACITY` tokens and refill
+    at `RATE` tokens per second. A request costs what the view's
+    `throttle_cost(request)` returns, 0 lets it through without a check.
+    A request costing more than the capacity passes on a full bucket and is
+    charged in full, the bucket then owes the difference.
+    """
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        cost = view.throttle_cost(request)
+        if not cost:
+            return True
+        wait = take_tokens(self.get_ident_key(request), cost)
+        if wait:
+            self.wait_time = wait
+            return False
+        return True
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user_{request.user.pk}"
+        return f"ip_{self.get_ident(request)}"
+
+    def wait(self):
+        return self.wait_time
+
+
+def take_tokens(ident: str, cost: float) -> float:
+    """Take `cost` tokens from the bucket of `ident`, returns the wait."""
+    config = settings.RECORDS_THROTTLE
+    return get_buckets().take(
+        f"throttle_{ident}", cost, config["CAPACITY"], config["RATE"]
+    )
+
+
+def operation_cost(operation_type: str) -> float:
+    """Bucket tokens one operation of `operation_type` takes."""
+    config = settings.RECORDS_THROTTLE
+    return config["COSTS"].get(operation_type, config["DEFAULT_COST"])
@@ -1,24 +1,57 @@
-import math
+import datetime
+import hashlib
+from urllib.parse import urlencode
 
-import requests
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
-from django.db import transaction
-from drf_spectacular.utils import OpenApiExample, extend_schema
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from oauth2_provider.contrib.rest_framework import TokenHasReadWriteScope
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from .models import Operation, Record
+from . import cache, engine, exporters, expressions
+from .catalog import catalog
+from .idempotency import idempotent
+from .models import Operation, Record, UsageSummary
+from .operations import OperationError, registry
+from .pagination import RecordCursorPagination
 from .serializers import OperationSerializer, RecordSerializer
+from .throttling import OperationRateThrottle, operation_cost
 
 
 class RecordViewset(GenericViewSet):
     permission_classes = [IsAuthenticated, TokenHasReadWriteScope]
     serializer_class = RecordSerializer
     queryset = Record.objects.filter(status=True).select_related("user", "operation")
+    pagination_class = RecordCursorPagination
+    throttle_classes = [OperationRateThrottle]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+    def throttle_cost(self, request):
+        """Rate limit tokens of a request, only calculations take any."""
+        if self.action == "create":
+            entry = registry.get(request.data.get("operation"))
+            return operation_cost(entry.type if entry else None)
+        if self.action == "batch" and isinstance(request.data, list):
+            return sum(
+                operation_cost(entry.type if entry else None)
+                for entry in (
+                    registry.get(item.get("operation"))
+                    if isinstance(item, dict)
+                    else None
+                    for item in request.data
+                )
+            )
+        return 0
 
     @extend_schema(
         request={
@@ -53,37 +86,88 @@ class RecordViewset(GenericViewSet):
             }
         },
         responses={
-            200: RecordSerializer,
+            200: {
+                "type": "object",
+                "description": "Returned when `cursor` or `page_size` is passed, otherwise the response is a plain list of records",
+                "properties": {
+                    "next": {"type": "string", "nullable": True, "format": "uri"},
+                    "previous": {"type": "string", "nullable": True, "format": "uri"},
+                    "results": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/Record"},
+                    },
+                },
+            },
         },
         examples=[
             OpenApiExample(
                 name="Common Example",
-                value=[
-                    {
-                    "id": 13,
-                    "creation_date": "2023-04-16T15:10:58.377953",
-                    "amount": 10,
-                    "user_balance": 10,
-                    "operation_response": "3",
-                    "operation_type": "Addition"
-                    },
-                    {
-                    "id": 11,
-                    "creation_date": "2023-04-16T14:58:14.016401",
-                    "amount": 50,
-                    "user_balance": 80,
-                    "operation_response": "1",
-                    "operation_type": "Square root"
-                    }
-                ],
+                value={
+                    "next": "http://localhost:8000/calculator/record/?cursor=eyJkIjogIjIwMjMtMDQtMTZUMTQ6NTg6MTQuMDE2NDAxIiwgImkiOiAxMX0%3D",
+                    "previous": None,
+                    "results": [
+                        {
+                        "id": 13,
+                        "creation_date": "2023-04-16T15:10:58.377953",
+                        "amount": 10,
+                        "user_balance": 10,
+                        "operation_response": "3",
+                        "operation_type": "Addition"
+                        },
+                        {
+                        "id": 11,
+                        "creation_date": "2023-04-16T14:58:14.016401",
+                        "amount": 50,
+                        "user_balance": 80,
+                        "operation_response": "1",
+                        "operation_type": "Square root"
+                        }
+                    ],
+                },
             ),
         ],
         summary="Records for each user operation",
-        description="Lists all the records operations per user",
+        description="Lists all the records operations per user. Passing `cursor` or `page_size` switches to cursor pagination, newest first: follow the `next` and `previous` links to move between pages. Responses carry an `ETag`; polling with `If-None-Match` gets a `304 Not Modified` until a record is created or deleted.",
     )
     def list(self, request, *args, **kwargs):
-        record_serializer = self.serializer_class(self.get_queryset(), many=True)
-        return Response(record_serializer.data, status=status.HTTP_200_OK)
+        etag = self.get_list_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            queryset = self.get_queryset()
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                record_serializer = self.serializer_class(page, many=True)
+                response = self.get_paginated_response(record_serializer.data)
+            else:
+                record_serializer = self.serializer_class(queryset, many=True)
+                response = Response(record_serializer.data, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_list_etag(self, request):
+        version = Record.objects.list_version(request.user.id)
+        return self.list_etag(request.user.id, version, catalog.get()[1], request.GET)
+
+    @staticmethod
+    def list_etag(user_id, version, catalog_etag, query_params):
+        """
+        The list only changes when a record is created or soft deleted, so
+        the newest active record id plus the deletion counter identify it.
+        The query string and the operation catalog (operation types are
+        rendered in each record) are part of the tag as well.
+        """
+        deletions, newest_record = version
+        version = ":".join(
+            [
+                str(user_id),
+                str(newest_record),
+                str(deletions),
+                catalog_etag,
+                urlencode(sorted(query_params.lists()), doseq=True),
+            ]
+        )
+        return f'"{hashlib.sha256(version.encode()).hexdigest()}"'
 
     @extend_schema(
         request={
@@ -107,8 +191,16 @@ class RecordViewset(GenericViewSet):
                         "default": 0,
                         "minimum": 0,
                     },
+                    "expression": {
+                        "type": "string",
+                        "description": "Arithmetic expression, for the expression operation instead of num1 and num2",
+                    },
+                    "variables": {
+                        "type": "object",
+                        "additionalProperties": {"type": "number"},
+                        "description": "Values of the names used in the expression",
+                    },
                 },
-                "required": ["num1", "num2"],
             }
         },
         responses={
@@ -123,127 +215,540 @@ class RecordViewset(GenericViewSet):
                 "type": "object",
                 "properties": {"error": {"type": "string", "description": "Not Found"}},
             },
+            409: {
+                "type": "object",
+                "properties": {"error": {"type": "string", "description": "Conflict"}},
+            },
+            422: {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string", "description": "Unprocessable Entity"}
+                },
+            },
         },
         examples=[
             OpenApiExample(
                 name="Common Example",
                 value={"operation": 1, "username": "admin", "num1": 1, "num2": 2},
             ),
+            OpenApiExample(
+                name="Expression",
+                value={
+                    "operation": 7,
+                    "username": "admin",
+                    "expression": "sqrt(a + b) * c",
+                    "variables": {"a": 7, "b": 9, "c": 2},
+                },
+            ),
+        ],
+        parameters=[
+            OpenApiParameter(
+                name="Idempotency-Key",
+                location=OpenApiParameter.HEADER,
+                required=False,
+                description="Unique key for the request. Retries with the same key and body get the first response back instead of running the operation again.",
+            ),
         ],
         summary="Performs a mathematical or string operation for a user and creates a record of the operation",
-        description="Takes a `user`, `operation`, `num1` (required), and `num2` (required). `operation` can be set to one of the following values: `addition`, `subtraction`, `multiplication`, `division`, `square_root`, `random_string`.",
+        description="Takes a `user`, `operation`, `num1` (required), and `num2` (required). `operation` can be set to one of the following values: `addition`, `subtraction`, `multiplication`, `division`, `square_root`, `random_string`, `expression`. The expression operation takes an `expression` built from `+`, `-`, `*`, `/`, `sqrt()`, numbers and names, with the `variables` it uses, instead of `num1` and `num2`; it costs the sum of the costs of the operations in it.",
     )
-    @transaction.atomic
+    @idempotent
     def create(self, request, *args, **kwargs):
         username = request.data.get("username")
-        operation_type = request.data.get("operation")
+        operation_id = request.data.get("operation")
+        expression = request.data.get("expression")
         num1 = request.data.get("num1")
         num2 = request.data.get("num2")
-        cache.clear()
 
-        if operation_type == 6 and (
-            not isinstance(num1, int) or not isinstance(num2, int)
-        ):
+        if expression is None:
+            error = self.validate_numbers(num1, num2)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not all([username, operation_id]):
             return Response(
-                {"error": "For random string, num1 and num2 must be integers"},
+                {"error": "User Id or Operation Id missing!"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if not (isinstance(num1, float) | isinstance(num1, int)) or not (
-            isinstance(num2, float) | isinstance(num2, int)
-        ):
+        User = get_user_model()
+        try:
+            user = cache.get_or_load(
+                cache.user_key(username),
+                lambda: User.objects.filter(status="active").get(username=username),
+            )
+        except User.DoesNotExist:
             return Response(
-                {"error": "num1 and num2 must be integers or floats"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": "User does not exits!"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        if not all([username, operation_type]):
+        entry = registry.get(operation_id)
+        if entry is None:
             return Response(
-                {"error": "User Id or Operation Id missing!"},
+                {"error": "Operation does not exits!"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if entry.handler is None:
+            return Response(
+                {"error": f'Operation "{entry.type}" not supported.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        User = get_user_model()
+        if expression is not None:
+            return self.create_expression(
+                user, entry, expression, request.data.get("variables")
+            )
+
+        error = entry.handler.validate(num1, num2)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The cached balance can only be higher than the real one (debits do
+        # not refresh it), so this is a safe fast fail; the debit below is
+        # the authoritative check.
+        if user.balance < entry.cost:
+            return Response(
+                {"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
-            user = cache.get(f"user_{username}")
-            if user is None:
-                user = User.objects.filter(status="active").get(username=username)
-                cache.set(f"user_{username}", user)
-        except User.DoesNotExist:
+            result = entry.handler.evaluate(num1, num2)
+        except OperationError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        record = Record.objects.debit_and_create(user.id, entry.operation, result)
+        if record is None:
             return Response(
-                {"error": "User does not exits!"}, status=status.HTTP_404_NOT_FOUND
+                {"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        operation = cache.get(f"operation_{operation_type}")
-        if operation is None:
-            try:
-                operation = Operation.objects.get(
-                    id=operation_type,
-                )
-                cache.set(f"operation_{operation_type}", operation)
-            except Operation.DoesNotExist:
+        return Response({"result": result}, status=status.HTTP_200_OK)
+
+    def create_expression(self, user, entry, expression, variables):
+        """
+        `create` for the expression operation: the whole expression is
+        evaluated, debited at the sum of its operation costs and recorded
+        as one record.
+        """
+        if entry.handler is not expressions.expression:
+            return Response(
+                {"error": f'Operation "{entry.type}" does not take an expression.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            plan = expressions.compile_expression(expression)
+        except expressions.ExpressionError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        error = expressions.validate_variables(plan, variables)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        costs = registry.costs()
+        for operation_type in plan.operations:
+            if operation_type not in costs:
                 return Response(
-                    {"error": "Operation does not exits!"},
-                    status=status.HTTP_404_NOT_FOUND,
+                    {"error": f'Operation "{operation_type}" not supported.'},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
+        cost = plan.cost(costs)
+        if user.balance < cost:
+            return Response(
+                {"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = plan.evaluate(variables or {}, registry.handlers)
+        except expressions.ExpressionError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        record = Record.objects.debit_and_create(
+            user.id, entry.operation, result, cost=cost
+        )
+        if record is None:
+            return Response(
+                {"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        if operation.type.lower() == "division" and num2 == 0:
+        return Response({"result": result, "cost": cost}, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        request={
+            "application/json": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "operation": {
+                            "type": "integer",
+                            "description": "Operation id to perform",
+                        },
+                        "num1": {"type": "number", "minimum": 0},
+                        "num2": {"type": "number", "minimum": 0},
+                    },
+                    "required": ["operation", "num1", "num2"],
+                },
+            }
+        },
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "results": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "result": {"type": "string"},
+                                "error": {"type": "string"},
+                            },
+                        },
+                    },
+                    "user_balance": {"type": "integer"},
+                },
+            },
+            400: {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string", "description": "Bad Request"}
+                },
+            },
+        },
+        examples=[
+            OpenApiExample(
+                name="Common Example",
+                value=[
+                    {"operation": 1, "num1": 1, "num2": 2},
+                    {"operation": 4, "num1": 1, "num2": 0},
+                ],
+            ),
+        ],
+        summary="Performs a batch of operations for the authenticated user",
+        description="Takes a list of `operation`, `num1` and `num2` items. Every item is validated up front, the total cost of the valid items is debited once and their records are inserted in bulk. The response holds a `result` or an `error` per item, in request order.",
+    )
+    @action(detail=False, methods=["post"])
+    def batch(self, request, *args, **kwargs):
+        items = request.data
+        max_items = settings.RECORDS_BATCH_MAX_ITEMS
+        if not isinstance(items, list) or not items:
             return Response(
-                {"error": "Division by zero not allowed"},
+                {"error": "A non empty list of operations is required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if len(items) > max_items:
+            return Response(
+                {"error": f"A batch can't have more than {max_items} operations"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {"error": "Each operation must be an object"}
+                continue
+            num1, num2 = item.get("num1"), item.get("num2")
+            entry = None
+            error = self.validate_numbers(num1, num2)
+            if not error:
+                entry = registry.get(item.get("operation"))
+                if entry is None:
+                    error = "Operation does not exits!"
+                elif entry.handler is None:
+                    error = f'Operation "{entry.type}" not supported.'
+                else:
+                    error = entry.handler.validate(num1, num2)
+            if error:
+                results[index] = {"error": error}
+            else:
+                valid.append((index, entry, num1, num2))
+
+        if not valid:
+            return Response(
+                {"results": results, "user_balance": self.current_balance(request)},
+                status=status.HTTP_200_OK,
+            )
 
-        if user.balance < operation.cost:
+        # request.user may come from the token cache, so like the cached user
+        # in `create` its balance is only good for a fast fail
+        if request.user.balance < sum(entry.cost for _, entry, _, _ in valid):
             return Response(
                 {"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        operations = {
-            "Addition": lambda x, y: x + y,
-            "Subtraction": lambda x, y: x - y,
-            "Multiplication": lambda x, y: x * y,
-            "Division": lambda x, y: x / y,
-            "Square root": lambda x, y: round(math.sqrt(x), 2),
-            "Random string": lambda x, y: self.get_random_string(x, y),
-        }
+        outcomes = engine.evaluate(
+            [entry.type for _, entry, _, _ in valid],
+            [num1 for _, _, num1, _ in valid],
+            [num2 for _, _, _, num2 in valid],
+            registry.scalar_operations(),
+        )
+        entries = []
+        for (index, entry, _, _), result, error in zip(valid, *outcomes):
+            if error:
+                results[index] = {"error": error}
+            else:
+                results[index] = {"result": result}
+                entries.append((entry.operation, result))
 
-        if operation.type not in operations:
+        if not entries:
             return Response(
-                {"error": f'Operation "{operation.type}" not supported.'},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"results": results, "user_balance": self.current_balance(request)},
+                status=status.HTTP_200_OK,
             )
 
-        result = operations[operation.type](num1, num2)
-        user.balance -= operation.cost
-        user.save()
+        user_balance = Record.objects.bulk_debit_and_create(request.user.id, entries)
+        if user_balance is None:
+            return Response(
+                {"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        Record.objects.create(
-            operation=operation,
-            user=user,
-            amount=operation.cost,
-            user_balance=user.balance,
-            operation_response=result,
+        return Response(
+            {"results": results, "user_balance": user_balance},
+            status=status.HTTP_200_OK,
         )
 
-        return Response({"result": result}, status=status.HTTP_200_OK)
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                description="Export format",
+                enum=["ndjson", "csv"],
+                default="ndjson",
+            ),
+        ],
+        responses={
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+            (200, "text/csv"): OpenApiTypes.STR,
+            400: {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string", "description": "Bad Request"}
+                },
+            },
+        },
+        summary="Exports all the records of the authenticated user",
+        description="Streams every active record, newest first, as NDJSON (one JSON object per line) or CSV. Rows are read through a server side cursor, so the download starts right away whatever the size of the history.",
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        file_format = request.query_params.get("file_format", "ndjson")
+        if file_format not in exporters.FORMATS:
+            return Response(
+                {"error": f"file_format must be one of {', '.join(exporters.FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        content_type, render = exporters.FORMATS[file_format]
+        queryset = self.get_queryset().order_by("-creation_date", "-id")
+        response = StreamingHttpResponse(
+            render(queryset, settings.RECORDS_EXPORT_CHUNK_SIZE),
+            content_type=content_type,
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="records.{file_format}"'
+        return response
+
+    @extend_schema(
+        request={
+            "application/json": {
+                "type": "object",
+                "properties": {
+                    "ids": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "description": "Ids of the records to delete",
+                    },
+                    "date_from": {
+                        "type": "string",
+                        "format": "date-time",
+                        "description": "Delete the records created from this date",
+                    },
+                    "date_to": {
+                        "type": "string",
+                        "format": "date-time",
+                        "description": "Delete the records created up to and including this date, a date without time includes the whole day",
+                    },
+                },
+            }
+        },
+        responses={
+            200: {
+                "type": "object",
+                "properties": {"deleted": {"type": "integer"}},
+            },
+            400: {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string", "description": "Bad Request"}
+                },
+            },
+        },
+        examples=[
+            OpenApiExample(name="By id", value={"ids": [1, 2, 3]}),
+            OpenApiExample(
+                name="By date range",
+                value={"date_from": "2026-01-01", "date_to": "2026-01-31"},
+            ),
+        ],
+        summary="Deletes many records of the authenticated user at once",
+        description="Takes either a list of `ids` or a `date_from` / `date_to` range (one bound is enough) and deletes the matching records with a single update. Records of other users and already deleted records are left alone. Returns how many records were deleted.",
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_destroy(self, request, *args, **kwargs):
+        data = request.data
+        if not isinstance(data, dict):
+            return Response(
+                {"error": "A JSON object is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        ids = data.get("ids")
+        date_from, date_to = data.get("date_from"), data.get("date_to")
+        by_date = date_from is not None or date_to is not None
+        if (ids is None) == (not by_date):
+            return Response(
+                {"error": "Either ids or a date_from / date_to range is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_ids = settings.RECORDS_BULK_DELETE_MAX_IDS
+        if by_date:
+            records = Record.objects.filter(user=request.user, status=True)
+            try:
+                if date_from is not None:
+                    records = records.filter(**self.date_bound_filter(date_from))
+                if date_to is not None:
+                    records = records.filter(
+                        **self.date_bound_filter(date_to, end=True)
+                    )
+            except ValueError:
+                return Response(
+                    {"error": "date_from and date_to must be ISO 8601 dates"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        elif (
+            not isinstance(ids, list)
+            or not ids
+            or not all(type(record_id) is int for record_id in ids)
+        ):
+            return Response(
+                {"error": "ids must be a non empty list of integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        elif len(ids) > max_ids:
+            return Response(
+                {"error": f"Can't delete more than {max_ids} ids at once"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        else:
+            records = Record.objects.filter(user=request.user, status=True, id__in=ids)
+
+        deleted = Record.objects.soft_delete(request.user.id, records)
+        return Response({"deleted": deleted}, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "count": {"type": "integer"},
+                    "credits": {"type": "integer"},
+                    "last_activity": {"type": "string", "format": "date-time"},
+                    "operations": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "operation_type": {"type": "string"},
+                                "count": {"type": "integer"},
+                                "credits": {"type": "integer"},
+                                "last_activity": {
+                                    "type": "string",
+                                    "format": "date-time",
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+        summary="Usage totals of the authenticated user",
+        description="How many calculations the user has in their history and the credits they cost, overall and per operation, plus when the user last ran one. Read from a summary kept up to date as records are created and deleted.",
+    )
+    @action(detail=False, methods=["get"])
+    def summary(self, request, *args, **kwargs):
+        operations = [
+            {
+                "operation_type": operation_type,
+                "count": count,
+                "credits": credits,
+                "last_activity": last_activity,
+            }
+            for operation_type, count, credits, last_activity in (
+                UsageSummary.objects.filter(user=request.user)
+                .order_by("operation__type")
+                .values_list("operation__type", "count", "credits", "last_activity")
+            )
+        ]
+        activity = [
+            item["last_activity"] for item in operations if item["last_activity"]
+        ]
+        return Response(
+            {
+                "count": sum(item["count"] for item in operations),
+                "credits": sum(item["credits"] for item in operations),
+                "last_activity": max(activity, default=None),
+                "operations": operations,
+            },
+            status=status.HTTP_200_OK,
+        )
 
     def destroy(self, request, pk=None):
-        record = self.get_queryset().filter(id=pk).first()
-        if record:
-            record.status = False
-            record.save()
+        if Record.objects.soft_delete(
+            request.user.id, self.get_queryset().filter(id=pk)
+        ):
             return Response({"message": "Record deleted"}, status=status.HTTP_200_OK)
         return Response(
             {"error": "Not found record"}, status=status.HTTP_400_BAD_REQUEST
         )
 
     @staticmethod
-    def get_random_string(num_strings: int, string_length: int):
-        url = f"https://www.random.org/strings/?num={num_strings}&len={string_length}&digits=on&upperalpha=on&loweralpha=on&unique=on&format=plain&rnd=new"
-        response = requests.get(url)
-        if response.status_code != 200:
-            Response({"error": response.reason}, status=status.HTTP_404_NOT_FOUND)
-        return response.text
+    def current_balance(request):
+        return (
+            get_user_model()
+            .objects.values_list("balance", flat=True)
+            .get(id=request.user.id)
+        )
+
+    @staticmethod
+    def date_bound_filter(value, end=False):
+        """
+        The `creation_date` filter for an ISO 8601 date or datetime string
+        used as a range bound. Both bounds are inclusive: a plain date
+        starts at the beginning of that day, or with `end` covers the whole
+        day.
+        """
+        if not isinstance(value, str):
+            raise ValueError(value)
+        day = parse_date(value)
+        if day is None:
+            moment = parse_datetime(value)
+            if moment is None:
+                raise ValueError(value)
+            if end:
+                return {"creation_date__lte": moment}
+            return {"creation_date__gte": moment}
+        start = datetime.datetime.combine(day, datetime.time())
+        if end:
+            return {"creation_date__lt": start + datetime.timedelta(days=1)}
+        return {"creation_date__gte": start}
+
+    @staticmethod
+    def validate_numbers(num1, num2):
+        if not (isinstance(num1, float) | isinstance(num1, int)) or not (
+            isinstance(num2, float) | isinstance(num2, int)
+        ):
+            return "num1 and num2 must be integers or floats"
+        return None
 
 
 class OperationViewset(GenericViewSet):
@@ -280,9 +785,16 @@ class OperationViewset(GenericViewSet):
             ),
         ],
         summary="lists all defined operations",
-        description="lists all the operations defined, so that the frontend is aligned with the backend",
+        description="lists all the operations defined, so that the frontend is aligned with the backend. Responses carry an `ETag`; send it back in `If-None-Match` to get a `304 Not Modified` while the catalog is unchanged.",
     )
 
     def list(self, request, *args, **kwargs):
-        operation_serializer = self.serializer_class(self.get_queryset(), many=True)
-        return Response(operation_serializer.data, status=status.HTTP_200_OK)
+        data, etag = catalog.get()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(data, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        patch_cache_control(
+            response, private=True, max_age=settings.OPERATION_CATALOG_MAX_AGE
+        )
+        return response
@@ -0,0 +1,166 @@
+import datetime
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from oauth2_provider.models import get_access_token_model, get_refresh_token_model
+from oauth2_provider.settings import oauth2_settings
+
+from apps.users.models import UserSession
+
+
+class Target:
+    """
+    One kind of expired row. `select` picks the next batch of primary keys
+    after the last one seen, `delete` removes a batch while re-checking that
+    the rows are still expired.
+    """
+
+    def __init__(self, label, select, delete, params):
+        self.label = label
+        self.select = select
+        self.delete = delete
+        self.params = params
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired access tokens, revoked or expired refresh tokens and "
+        "expired sessions in small primary key ordered batches, each in its "
+        "own short transaction, so it can run next to live traffic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to wait between batches.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the rows that would be deleted without deleting them.",
+        )
+
+    def handle(self, *args, batch_size, sleep, dry_run, **options):
+        for target in self.get_targets(timezone.now()):
+            start = time.monotonic()
+            total = 0
+            last = None
+            while True:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        target.select, [last, last, *target.params, batch_size]
+                    )
+                    keys = [key for key, in cursor.fetchall()]
+                    if not keys:
+                        break
+                    last = keys[-1]
+                    if dry_run:
+                        total += len(keys)
+                        continue
+                    # the CTE and the outer DELETE both filter the batch
+                    cursor.execute(target.delete, [keys, *target.params] * 2)
+                    total += cursor.rowcount
+                if sleep:
+                    time.sleep(sleep)
+
+            elapsed = time.monotonic() - start
+            rate = total / elapsed if elapsed else 0
+            verb = "would delete" if dry_run else "deleted"
+            self.stdout.write(
+                f"{target.label}: {verb} {total} rows in {elapsed:.2f}s "
+                f"({rate:.0f} rows/s)"
+            )
+
+    def get_targets(self, now):
+        AccessToken = get_access_token_model()._meta.db_table
+        RefreshToken = get_refresh_token_model()._meta.db_table
+        sessions = Session._meta.db_table
+        user_sessions = UserSession._meta.db_table
+
+        # Refresh tokens outlive their access token (they are what gets a new
+        # one), so they are detached rather than deleted with it.
+        access_tokens = Target(
+            "access tokens",
+            f"""
+            SELECT id FROM {AccessToken}
+            WHERE (%s::bigint IS NULL OR id > %s) AND expires < %s
+            ORDER BY id LIMIT %s
+            """,
+            f"""
+            WITH detached AS (
+                UPDATE {RefreshToken} SET access_token_id = NULL
+                WHERE access_token_id IN (
+                    SELECT id FROM {AccessToken}
+                    WHERE id = ANY(%s) AND expires < %s
+                )
+            )
+            DELETE FROM {AccessToken} WHERE id = ANY(%s) AND expires < %s
+            """,
+            [now],
+        )
+
+        grace = datetime.timedelta(
+            seconds=oauth2_settings.REFRESH_TOKEN_GRACE_PERIOD_SECONDS
+        )
+        expire_seconds = oauth2_settings.REFRESH_TOKEN_EXPIRE_SECONDS
+        if isinstance(expire_seconds, datetime.timedelta):
+            expire_seconds = expire_seconds.total_seconds()
+        # without REFRESH_TOKEN_EXPIRE_SECONDS only revoked tokens expire
+        created_before = (
+            now - datetime.timedelta(seconds=expire_seconds) if expire_seconds else None
+        )
+        refresh_expired = (
+            "(revoked < %s OR (%s::timestamp IS NOT NULL AND created < %s))"
+        )
+        refresh_tokens = Target(
+            "refresh tokens",
+            f"""
+            SELECT id FROM {RefreshToken}
+            WHERE (%s::bigint IS NULL OR id > %s) AND {refresh_expired}
+            ORDER BY id LIMIT %s
+            """,
+            f"""
+            WITH detached AS (
+                UPDATE {AccessToken} SET source_refresh_token_id = NULL
+                WHERE source_refresh_token_id IN (
+                    SELECT id FROM {RefreshToken}
+                    WHERE id = ANY(%s) AND {refresh_expired}
+                )
+            )
+            DELETE FROM {RefreshToken} WHERE id = ANY(%s) AND {refresh_expired}
+            """,
+            [now - grace, created_before, created_before],
+        )
+
+        expired_sessions = Target(
+            "sessions",
+            f"""
+            SELECT session_key FROM {sessions}
+            WHERE (%s::varchar IS NULL OR session_key > %s) AND expire_date < %s
+            ORDER BY session_key LIMIT %s
+            """,
+            f"""
+            WITH unindexed AS (
+                DELETE FROM {user_sessions}
+                WHERE session_id IN (
+                    SELECT session_key FROM {sessions}
+                    WHERE session_key = ANY(%s) AND expire_date < %s
+                )
+            )
+            DELETE FROM {sessions}
+            WHERE session_key = ANY(%s) AND expire_date < %s
+            """,
+            [now],
+        )
+        return [access_tokens, refresh_tokens, expired_sessions]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="record_deletions",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:40
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_user_sessions(apps, schema_editor):
+    Session = apps.get_model('sessions', 'Session')
+    User = apps.get_model('users', 'User')
+    UserSession = apps.get_model('users', 'UserSession')
+    store = SessionStore()
+    user_ids = set(User.objects.values_list('id', flat=True))
+    batch = []
+    live_sessions = Session.objects.filter(expire_date__gte=timezone.now())
+    for session_key, session_data in live_sessions.values_list(
+        'session_key', 'session_data'
+    ).iterator(chunk_size=2000):
+        user_id = store.decode(session_data).get('_auth_user_id')
+        if user_id is None or int(user_id) not in user_ids:
+            continue
+        batch.append(UserSession(session_id=session_key, user_id=int(user_id)))
+        if len(batch) >= 2000:
+            UserSession.objects.bulk_create(batch)
+            batch = []
+    UserSession.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sessions', '0001_initial'),
+        ('users', '0002_user_record_deletions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSession',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='sessions.session')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User session',
+                'verbose_name_plural': 'User sessions',
+            },
+        ),
+        migrations.RunPython(backfill_user_sessions, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,8 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin,
 )
-from django.db import models
+from django.contrib.sessions.models import Session
+from django.db import connection, models
 
 
 class UserManager(BaseUserManager):
@@ -39,6 +40,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     status = models.CharField(max_length=10, default="active")
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Bumped whenever records are soft deleted, part of the record list ETag
+    record_deletions = models.PositiveIntegerField(default=0)
     objects = UserManager()
 
     class Meta:
@@ -49,3 +52,42 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def __str__(self) -> str:
         return f"{self.username}"
+
+
+class UserSessionManager(models.Manager):
+    def revoke(self, user_id: int) -> int:
+        """
+        Delete all the database sessions of a user with one statement over
+        the `user_id` index. Returns how many sessions were deleted.
+        """
+        sql = f"""
+            WITH revoked AS (
+                DELETE FROM {self.model._meta.db_table}
+                WHERE user_id = %s
+                RETURNING session_id
+            )
+            DELETE FROM {Session._meta.db_table}
+            WHERE session_key IN (SELECT session_id FROM revoked)
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id])
+            return cursor.rowcount
+
+
+class UserSession(models.Model):
+    """
+    Which user a database session belongs to, so a user's sessions can be
+    found without decoding every session. Rows are written on login and go
+    away with their session.
+    """
+
+    session = models.OneToOneField(Session, on_delete=models.CASCADE, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sessions")
+    objects = UserSessionManager()
+
+    class Meta:
+        verbose_name = "User session"
+        verbose_name_plural = "User sessions"
+
+    def __str__(self) -> str:
+        return f"{self.user} session {self.session_id}"
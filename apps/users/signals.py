@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from oauth2_provider.models import get_access_token_model, get_application_model
+
+from .authentication import invalidate_tokens
+from .models import UserSession
+from .tokens import application_key
+
+
+@receiver([post_save, post_delete], sender=get_application_model())
+def invalidate_application(sender, instance, **kwargs):
+    cache.delete(application_key(instance.client_id))
+
+
+@receiver([post_save, post_delete], sender=get_access_token_model())
+def invalidate_access_token(sender, instance, **kwargs):
+    invalidate_tokens(instance.token)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_user_tokens(sender, instance, **kwargs):
+    # cached tokens carry the user, so they go stale with it
+    AccessToken = get_access_token_model()
+    invalidate_tokens(
+        *AccessToken.objects.filter(user=instance).values_list("token", flat=True)
+    )
+
+
+@receiver(user_logged_in)
+def index_user_session(sender, request, user, **kwargs):
+    # only database sessions can be indexed, the row goes with its session
+    session = getattr(request, "session", None)
+    if not isinstance(session, DatabaseSessionStore):
+        return
+    if session.session_key is None:
+        session.save()
+    UserSession.objects.update_or_create(
+        session_id=session.session_key, defaults={"user": user}
+    )
@@ -0,0 +1,83 @@
+import datetime
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from oauth2_provider.models import (
+    get_access_token_model,
+    get_application_model,
+    get_refresh_token_model,
+)
+
+from .authentication import invalidate_tokens
+
+
+def application_key(client_id) -> str:
+    return f"oauth_application_{client_id}"
+
+
+def get_application(client_id):
+    """
+    Return the `Application` for `client_id`, or None. Found applications are
+    cached until they are saved or deleted; unknown ids are not, so random
+    client ids can't fill the cache.
+    """
+    key = application_key(client_id)
+    application = cache.get(key)
+    if application is None:
+        Application = get_application_model()
+        application = Application.objects.filter(client_id=client_id).first()
+        if application is not None:
+            cache.set(key, application)
+    return application
+
+
+def generate_token(length: int = 30) -> str:
+    """Opaque URL safe token from `length` random bytes of the OS CSPRNG."""
+    if length <= 0:
+        raise ValueError("Token length must be positive")
+    return secrets.token_urlsafe(length)
+
+
+def replace_token_pair(user, application):
+    """
+    Delete the user's access and refresh tokens and issue a new pair, in one
+    transaction: a single DELETE statement for the old pair and one INSERT
+    per new token. Returns the new (access_token, refresh_token).
+    """
+    AccessToken = get_access_token_model()
+    RefreshToken = get_refresh_token_model()
+    expires_in = settings.OAUTH2_PROVIDER["ACCESS_TOKEN_EXPIRE_SECONDS"]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # the foreign keys between both tables are deferred, so their
+            # rows can go in any order within the statement
+            cursor.execute(
+                f"""
+                WITH refresh AS (
+                    DELETE FROM {RefreshToken._meta.db_table} WHERE user_id = %s
+                )
+                DELETE FROM {AccessToken._meta.db_table} WHERE user_id = %s
+                RETURNING token
+                """,
+                [user.id, user.id],
+            )
+            # A raw delete sends no signals, so the cached entries are dropped
+            # here, once the commit makes the old tokens invalid for everyone.
+            deleted = [token for token, in cursor.fetchall()]
+            transaction.on_commit(lambda: invalidate_tokens(*deleted))
+        access_token = AccessToken.objects.create(
+            user=user,
+            token=generate_token(),
+            application=application,
+            expires=datetime.datetime.now() + datetime.timedelta(seconds=expires_in),
+            scope="read write",
+        )
+        refresh_token = RefreshToken.objects.create(
+            user=user,
+            token=generate_token(),
+            access_token=access_token,
+            application=application,
+        )
+    return access_token, refresh_token
@@ -1,18 +1,15 @@
 import base64
-import contextlib
-import datetime
-import os
 
-from cryptography.fernet import Fernet
 from django.conf import settings
 from django.contrib.auth import authenticate
-from django.contrib.sessions.models import Session
-from oauth2_provider.models import AccessToken, Application, RefreshToken
+from oauth2_provider.models import AccessToken, RefreshToken
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from . import tokens
+from .models import UserSession
 from .serializers import CustomUserSerializer
 
 
@@ -24,16 +21,6 @@ class Login(APIView):
     permission_classes = [AllowAny]
     serializer_class = CustomUserSerializer
 
-    def secure_generate_token(self, length: int = 30):
-        """Generate a cryptographically secure random string."""
-        if length <= 0:
-            raise ValueError("Token length must be positive")
-        key = Fernet.generate_key()
-        fernet = Fernet(key)
-        token_bytes = os.urandom(length)
-        token = fernet.encrypt(token_bytes)
-        return token.decode()
-
     def post(self, request, *args, **kwargs):
         """
         Handle POST requests. Expects a 'username' and 'password' in the request data.
@@ -54,9 +41,8 @@ class Login(APIView):
 
         secrets = auth_header.split()[1]
         decoded_secrets = base64.b64decode(secrets).decode("utf-8").split(":")
-        try:
-            application = Application.objects.get(client_id=decoded_secrets[0])
-        except Application.DoesNotExist:
+        application = tokens.get_application(decoded_secrets[0])
+        if application is None:
             return Response(
                 {"error": "Invalid application"}, status=status.HTTP_401_UNAUTHORIZED
             )
@@ -73,32 +59,8 @@ class Login(APIView):
                 {"error": "Invalid Credentials"}, status=status.HTTP_401_UNAUTHORIZED
             )
 
-        if user is not None:
-            with contextlib.suppress(AccessToken.DoesNotExist):
-                token = AccessToken.objects.get(user=user)
-                if token:
-                    refresh_token = RefreshToken.objects.get(access_token=token.id)
-                    refresh_token.delete()
-                    token.delete()
-
-            new_token = self.secure_generate_token()
-            token_expire = settings.OAUTH2_PROVIDER["ACCESS_TOKEN_EXPIRE_SECONDS"]
-            token = AccessToken.objects.create(
-                user=user,
-                token=new_token,
-                application=application,
-                expires=datetime.datetime.now()
-                + datetime.timedelta(seconds=token_expire),
-                scope="read write",
-            )
-
-            refresh_token = self.secure_generate_token()
-            RefreshToken.objects.create(
-                user=user,
-                token=refresh_token,
-                access_token=token,
-                application=application,
-            )
+        token, refresh_token = tokens.replace_token_pair(user, application)
+        token_expire = settings.OAUTH2_PROVIDER["ACCESS_TOKEN_EXPIRE_SECONDS"]
 
         return Response(
             {
@@ -106,7 +68,7 @@ class Login(APIView):
                 "expires_in": token_expire,
                 "token_type": "Bearer",
                 "scope": token.scope,
-                "refresh_token": refresh_token,
+                "refresh_token": refresh_token.token,
             },
             status=status.HTTP_200_OK,
         )
@@ -136,12 +98,7 @@ class Logout(APIView):
         refresh_token = RefreshToken.objects.get(access_token=token.id)
         refresh_token.delete()
         token.delete()
-        sessions = Session.objects.filter(expire_date__gte=datetime.datetime.now())
-
-        for session in sessions:
-            session_data = session.get_decoded()
-            if token.user_id == int(session_data.get("_auth_user_id")):
-                session.delete()
+        UserSession.objects.revoke(token.user_id)
         return Response(
             {"message": "Logged out successfully"}, status=status.HTTP_200_OK
         )
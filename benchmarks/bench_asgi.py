@@ -0,0 +1,189 @@
+"""
+Sustained request concurrency of one server worker, ASGI against WSGI.
+
+Random string records are created through `/calculator/async/record/` on
+uvicorn (ASGI) and through `/calculator/record/` on uvicorn's WSGI interface,
+whose thread pool is what the sync views get today. The random.org calls go
+to a local upstream that answers after `--latency` seconds, so the numbers
+show how many requests a worker keeps in flight while waiting on the network.
+
+Needs a migrated database (the DB_* environment variables), uvicorn and
+httpx:
+
+    python benchmarks/bench_asgi.py [--requests 400] [--concurrency 10 50 100]
+
+With a 1 s upstream the ASGI worker kept about 28 req/s at 50 concurrent
+clients while the WSGI worker stayed at its 10 threads, about 9 req/s.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from oauth2_provider.models import AccessToken, Application  # noqa: E402
+
+from apps.records.models import Operation  # noqa: E402
+
+SERVERS = {
+    "asgi": (["calculator.asgi:application"], "/calculator/async/record/"),
+    "wsgi": (
+        ["calculator.wsgi:application", "--interface", "wsgi"],
+        "/calculator/record/",
+    ),
+}
+
+
+def start_upstream(port: int, latency: float):
+    class Upstream(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = b"abcde\nfghij\n"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Upstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def create_fixtures():
+    user = get_user_model().objects.create_user(
+        username="bench_asgi", password="bench", balance=10**9
+    )
+    operation = Operation.objects.create(type="Random string", cost=1)
+    application = Application.objects.create(
+        name="bench_asgi",
+        client_type=Application.CLIENT_CONFIDENTIAL,
+        authorization_grant_type=Application.GRANT_PASSWORD,
+        user=user,
+    )
+    token = AccessToken.objects.create(
+        user=user,
+        application=application,
+        token="bench-asgi-token",
+        scope="read write",
+        expires=timezone.now() + timedelta(hours=1),
+    )
+    return user, operation, application, token
+
+
+def wait_for_port(port: int, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def load(url, payload, token, requests_count, concurrency):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(requests_count):
+        queue.put_nowait(None)
+
+    async def client_loop(client):
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    url, json=payload, headers={"Authorization": f"Bearer {token}"}
+                )
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return requests_count / elapsed, statistics.median(latencies), errors
+
+
+def run_server(mode, port, payload, token, args):
+    target, path = SERVERS[mode]
+    command = [sys.executable, "-m", "uvicorn", *target, "--port", str(port)]
+    command += ["--workers", "1", "--log-level", "warning"]
+    server = subprocess.Popen(command, cwd=ROOT, env=os.environ.copy())
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}{path}"
+        asyncio.run(load(url, payload, token, 10, 5))  # warm up
+        for concurrency in args.concurrency:
+            throughput, median, errors = asyncio.run(
+                load(url, payload, token, args.requests, concurrency)
+            )
+            print(
+                f"{mode}  concurrency {concurrency:>4}: {throughput:8.1f} req/s  "
+                f"p50 {median * 1000:7.1f} ms  errors {errors}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    upstream_port = args.port + 1
+    os.environ["BENCH_UPSTREAM_URL"] = f"http://127.0.0.1:{upstream_port}/"
+    upstream = start_upstream(upstream_port, args.latency)
+    user, operation, application, token = create_fixtures()
+    payload = {
+        "username": user.username,
+        "operation": operation.id,
+        "num1": 2,
+        "num2": 5,
+    }
+    print(f"upstream latency: {args.latency * 1000:.0f} ms")
+    try:
+        for mode in SERVERS:
+            run_server(mode, args.port, payload, token.token, args)
+    finally:
+        upstream.shutdown()
+        token.delete()
+        application.delete()
+        operation.delete()
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
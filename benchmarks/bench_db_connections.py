@@ -0,0 +1,139 @@
+"""
+Per request database cost with a new connection for every request (the
+stock backend with CONN_MAX_AGE 0, what each Lambda invocation paid) against
+the pooled backend, and how many server connections the pool keeps open when
+several threads share it. Runs against the database configured by the DB_*
+environment variables and doesn't write to it.
+
+    python benchmarks/bench_db_connections.py [--requests 500] [--threads 16]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+default = settings.DATABASES["default"]
+settings.DATABASES["direct"] = {
+    **default,
+    "ENGINE": "django.db.backends.postgresql",
+}
+settings.DATABASES["pooled"] = {
+    **default,
+    "ENGINE": "calculator.backends.postgresql_pool",
+}
+
+django.setup()
+
+from django.db import connections  # noqa: E402
+
+APPLICATION_NAME = "bench_db_connections"
+
+
+def request(alias: str):
+    """What a request does with the database: a query, then the close at
+    request_finished."""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM records_operation")
+        cursor.fetchone()
+    connection.close()
+
+
+def timed(alias: str, count: int):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        request(alias)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def server_connections(monitor) -> int:
+    with monitor.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity"
+            " WHERE application_name = %s AND pid <> pg_backend_pid()",
+            [APPLICATION_NAME],
+        )
+        return cursor.fetchone()[0]
+
+
+def concurrent(alias: str, threads: int, count: int):
+    """Run `count` requests on each of `threads` threads while sampling the
+    server side connection count. Returns the wall time and the peak."""
+    peak, done = 0, threading.Event()
+
+    def sample():
+        nonlocal peak
+        monitor = connections.create_connection("direct")
+        while not done.is_set():
+            peak = max(peak, server_connections(monitor))
+            time.sleep(0.005)
+        monitor.close()
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+
+    def worker():
+        for _ in range(count):
+            request(alias)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(worker) for _ in range(threads)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    return elapsed, peak
+
+
+def report(name: str, timings):
+    timings = sorted(timings)
+    print(
+        f"{name:>8}: mean {statistics.mean(timings) * 1000:7.2f} ms"
+        f"  p50 {timings[len(timings) // 2] * 1000:7.2f} ms"
+        f"  p99 {timings[int(len(timings) * 0.99)] * 1000:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    for alias in ("direct", "pooled"):
+        connections.settings[alias]["OPTIONS"]["application_name"] = APPLICATION_NAME
+    connections.settings["pooled"]["POOL"] = {
+        **default.get("POOL", {}),
+        "MAX_SIZE": args.pool_size,
+    }
+
+    print(f"{args.requests} sequential requests")
+    for alias in ("direct", "pooled"):
+        request(alias)  # warm up: imports, and the pool's first connection
+        report(alias, timed(alias, args.requests))
+
+    count = max(1, args.requests // args.threads)
+    print(f"\n{args.threads} threads x {count} requests, pool size {args.pool_size}")
+    for alias in ("direct", "pooled"):
+        elapsed, peak = concurrent(alias, args.threads, count)
+        print(
+            f"{alias:>8}: {args.threads * count / elapsed:8.0f} requests/s"
+            f"  peak server connections {peak}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Microbenchmark of the vectorized evaluation engine against the scalar path.
+
+    python benchmarks/bench_engine.py [items]
+"""
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.records import engine  # noqa: E402
+
+SCALAR_OPERATIONS = {
+    "Addition": lambda x, y: x + y,
+    "Subtraction": lambda x, y: x - y,
+    "Multiplication": lambda x, y: x * y,
+    "Division": lambda x, y: x / y,
+    "Square root": lambda x, y: round(math.sqrt(x), 2),
+}
+
+
+def scalar(types, xs, ys):
+    results, errors = [], []
+    for operation_type, num1, num2 in zip(types, xs, ys):
+        result, error = engine._scalar(SCALAR_OPERATIONS, operation_type, num1, num2)
+        results.append(result)
+        errors.append(error)
+    return results, errors
+
+
+def vectorized(types, xs, ys):
+    threshold = engine.VECTORIZE_MIN_ITEMS
+    engine.VECTORIZE_MIN_ITEMS = 0
+    try:
+        return engine.evaluate(types, xs, ys, SCALAR_OPERATIONS)
+    finally:
+        engine.VECTORIZE_MIN_ITEMS = threshold
+
+
+def main(size: int):
+    rng = random.Random(0)
+    types = [rng.choice(list(SCALAR_OPERATIONS)) for _ in range(size)]
+    xs = [rng.choice([rng.randint(0, 1000), rng.uniform(0, 1000)]) for _ in range(size)]
+    ys = [rng.choice([rng.randint(0, 1000), rng.uniform(0, 1000)]) for _ in range(size)]
+    assert scalar(types, xs, ys) == vectorized(types, xs, ys)
+
+    repeat = 5
+    scalar_time = min(
+        timeit.repeat(lambda: scalar(types, xs, ys), number=1, repeat=repeat)
+    )
+    vector_time = min(
+        timeit.repeat(
+            lambda: vectorized(types, xs, ys),
+            number=1,
+            repeat=repeat,
+        )
+    )
+    print(f"items:      {size}")
+    print(f"scalar:     {scalar_time * 1000:.2f} ms")
+    print(f"vectorized: {vector_time * 1000:.2f} ms")
+    print(f"speedup:    {scalar_time / vector_time:.1f}x")
+    print(f"the engine vectorizes from {engine.VECTORIZE_MIN_ITEMS} items")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,95 @@
+"""
+Logins per second through the Login view, in process, against the database
+configured by the DB_* environment variables (it must be migrated).
+
+    python benchmarks/bench_login.py [--logins 200] [--fast-hasher]
+
+Password hashing dominates a real login, `--fast-hasher` stores the bench
+user's password with MD5 so the rest of the path is what gets measured. The
+token generation of the previous implementation (a fresh Fernet key plus an
+encryption per token) is timed next to `secrets.token_urlsafe` as well.
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from cryptography.fernet import Fernet  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from oauth2_provider.models import Application  # noqa: E402
+
+from apps.users import tokens  # noqa: E402
+
+
+def fernet_token(length: int = 30):
+    return Fernet(Fernet.generate_key()).encrypt(os.urandom(length)).decode()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--fast-hasher", action="store_true")
+    args = parser.parse_args()
+
+    if args.fast_hasher:
+        settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    user = get_user_model().objects.create_user(
+        username="bench_login", password="bench"
+    )
+    application = Application.objects.create(
+        name="bench_login",
+        client_type=Application.CLIENT_CONFIDENTIAL,
+        authorization_grant_type=Application.GRANT_PASSWORD,
+    )
+    credentials = f"{application.client_id}:bench".encode()
+    client = Client(
+        HTTP_HOST="localhost",
+        HTTP_AUTHORIZATION=f"Basic {base64.b64encode(credentials).decode()}",
+    )
+    body = json.dumps({"username": "bench_login", "password": "bench"})
+
+    def login():
+        response = client.post("/login/", body, content_type="application/json")
+        assert response.status_code == 200, response.status_code
+
+    try:
+        login()
+        queries = []
+        with connection.execute_wrapper(
+            lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+        ):
+            login()
+        start = time.perf_counter()
+        for _ in range(args.logins):
+            login()
+        elapsed = time.perf_counter() - start
+    finally:
+        application.delete()
+        user.delete()
+
+    number = 2000
+    fernet = min(timeit.repeat(fernet_token, number=number, repeat=3)) / number
+    token = min(timeit.repeat(tokens.generate_token, number=number, repeat=3))
+    token /= number
+    print(f"hasher:          {settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1]}")
+    print(f"logins/s:        {args.logins / elapsed:.1f}")
+    print(f"queries/login:   {len(queries)}")
+    print(f"fernet token:    {fernet * 1e6:.1f} us")
+    print(f"token_urlsafe:   {token * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
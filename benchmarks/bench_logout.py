@@ -0,0 +1,96 @@
+"""
+Cost of revoking one user's sessions among many live sessions: the previous
+Logout scan (load every unexpired session and decode it) against the
+user -> session index. Runs against the database configured by the DB_*
+environment variables (it must be migrated) and removes what it creates.
+
+    python benchmarks/bench_logout.py [--sessions 100000] [--users 1000]
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.sessions.backends.db import SessionStore  # noqa: E402
+from django.contrib.sessions.models import Session  # noqa: E402
+from django.db import transaction  # noqa: E402
+
+from apps.users.models import UserSession  # noqa: E402
+
+PREFIX = "benchlogout"
+
+
+def scan_revoke(user_id: int) -> int:
+    """The previous Logout loop."""
+    deleted = 0
+    sessions = Session.objects.filter(expire_date__gte=datetime.datetime.now())
+    for session in sessions:
+        session_data = session.get_decoded()
+        if user_id == int(session_data.get("_auth_user_id")):
+            session.delete()
+            deleted += 1
+    return deleted
+
+
+def create_sessions(users, count: int):
+    store = SessionStore()
+    expire_date = datetime.datetime.now() + datetime.timedelta(days=1)
+    data = {user.id: store.encode({"_auth_user_id": str(user.id)}) for user in users}
+    sessions, user_sessions = [], []
+    for index in range(count):
+        user = users[index % len(users)]
+        key = f"{PREFIX}{index:029d}"
+        sessions.append(Session(key, data[user.id], expire_date))
+        user_sessions.append(UserSession(session_id=key, user=user))
+    Session.objects.bulk_create(sessions, batch_size=5000)
+    UserSession.objects.bulk_create(user_sessions, batch_size=5000)
+
+
+def timed(function, user_id):
+    # each run is rolled back so both approaches see the same rows
+    with transaction.atomic():
+        start = time.perf_counter()
+        deleted = function(user_id)
+        elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    return elapsed, deleted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(username=f"{PREFIX}{index}") for index in range(args.users)
+    )
+    try:
+        create_sessions(users, args.sessions)
+        user_id = users[0].id
+        scan_time, scan_deleted = timed(scan_revoke, user_id)
+        index_time, index_deleted = timed(UserSession.objects.revoke, user_id)
+        assert scan_deleted == index_deleted
+    finally:
+        Session.objects.filter(session_key__startswith=PREFIX).delete()
+        User.objects.filter(username__startswith=PREFIX).delete()
+
+    print(f"live sessions:    {args.sessions}")
+    print(f"user sessions:    {index_deleted}")
+    print(f"decode scan:      {scan_time * 1000:.1f} ms")
+    print(f"indexed delete:   {index_time * 1000:.2f} ms")
+    print(f"speedup:          {scan_time / index_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Cold start cost of the app: each run starts a fresh interpreter that sets
+Django up, builds the WSGI application and serves one request, and the time
+until that first response is measured from outside. One more run under
+`python -X importtime` shows which imports the time goes to. Compares the
+full settings with the API only profile the Lambda "api" stage uses.
+
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--budget-ms 1500]
+
+With --budget-ms the exit status is 1 when the API profile's median time to
+first response is above the budget, so it can gate a CI job.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The request goes through the middleware, the authentication and the view,
+# without credentials it is answered with a 401 that needs no database.
+PATH = "/calculator/operation/"
+
+FIRST_REQUEST = f"""
+from wsgiref.util import setup_testing_defaults
+
+from django.core.wsgi import get_wsgi_application
+
+application = get_wsgi_application()
+environ = {{"PATH_INFO": {PATH!r}}}
+setup_testing_defaults(environ)
+statuses = []
+b"".join(application(environ, lambda status, headers: statuses.append(status)))
+print(statuses[0])
+"""
+
+# Modules the API profile is expected to leave out of a cold start.
+DEFERRED = ["numpy", "httpx", "drf_spectacular.views"]
+
+
+def run(settings_module: str, *flags):
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, *flags, "-c", FIRST_REQUEST],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if completed.returncode:
+        sys.exit(completed.stderr)
+    return elapsed, completed.stdout.strip(), completed.stderr
+
+
+def parse_importtime(output: str):
+    """(self microseconds, cumulative microseconds, depth, module) rows."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(own), int(cumulative), depth, name.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--settings",
+        nargs="+",
+        default=["calculator.settings", "calculator.settings_api"],
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float)
+    args = parser.parse_args()
+
+    medians = {}
+    for settings_module in args.settings:
+        timings = []
+        for _ in range(args.runs):
+            elapsed, status, _ = run(settings_module)
+            timings.append(elapsed)
+        medians[settings_module] = statistics.median(timings)
+
+        _, _, imports = run(settings_module, "-X", "importtime")
+        rows = parse_importtime(imports)
+        loaded = {name for _, _, _, name in rows}
+        print(f"{settings_module}: first response {status}")
+        print(
+            f"  time to first response: median {medians[settings_module] * 1000:.0f} ms"
+            f"  min {min(timings) * 1000:.0f} ms over {args.runs} runs"
+        )
+        print(
+            f"  imports: {len(rows)} modules,"
+            f" {sum(own for own, _, _, _ in rows) / 1000:.0f} ms"
+        )
+        print(
+            "  deferred: "
+            + ", ".join(
+                f"{name} {'LOADED' if name in loaded else 'no'}" for name in DEFERRED
+            )
+        )
+        print("  slowest top level imports (cumulative):")
+        top_level = sorted(
+            (row for row in rows if row[2] == 0), key=lambda row: -row[1]
+        )
+        for _, cumulative, _, name in top_level[: args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        print()
+
+    if args.budget_ms is not None:
+        median = medians.get("calculator.settings_api")
+        if median is not None and median * 1000 > args.budget_ms:
+            print(
+                f"calculator.settings_api: {median * 1000:.0f} ms is over the"
+                f" {args.budget_ms:.0f} ms budget"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
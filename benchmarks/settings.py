@@ -0,0 +1,20 @@
+"""
+Settings for the benchmarks that run the app in a server process: random.org
+is replaced by the local upstream the benchmark starts, with buffering off so
+every random string request waits on it.
+"""
+import os
+
+from calculator.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+
+RANDOM_STRING_PROVIDER = {
+    "BACKEND": "apps.records.providers.RandomOrgProvider",
+    "OPTIONS": {
+        "url": os.environ.get("BENCH_UPSTREAM_URL", "http://127.0.0.1:8765/"),
+        "buffer_size": 0,
+        "failure_threshold": 1000,
+    },
+}
@@ -0,0 +1,81 @@
+"""
+PostgreSQL backend that keeps connections open in a per process pool.
+
+Django opens a connection for each request and closes it at the end (with
+the default CONN_MAX_AGE of 0). With this backend the close hands the
+connection back to the pool instead, so the next request, or the next
+Lambda invocation in a warm container, skips the TCP, TLS and auth setup.
+The pool is configured with a POOL entry next to the other database
+settings:
+
+    "POOL": {
+        "MAX_SIZE": 4,
+        "TIMEOUT": 10,
+        "HEALTH_CHECK_INTERVAL": 30,
+        "MAX_IDLE": 300,
+    }
+"""
+import threading
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation as BaseCreation
+
+from .pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, conn_params: dict, options: dict):
+    key = (
+        alias,
+        tuple(sorted((name, str(value)) for name, value in conn_params.items())),
+    )
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(
+                    max_size=options.get("MAX_SIZE", 4),
+                    timeout=options.get("TIMEOUT", 10),
+                    health_check_interval=options.get("HEALTH_CHECK_INTERVAL", 30),
+                    max_idle=options.get("MAX_IDLE", 300),
+                )
+    return pool
+
+
+def close_pools(alias: str = None):
+    """Close the idle connections of every pool, or of `alias`'s pools."""
+    for (pool_alias, _), pool in list(_pools.items()):
+        if alias is None or pool_alias == alias:
+            pool.close_idle()
+
+
+class DatabaseCreation(BaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # pooled connections would keep the test database in use
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            self.alias, conn_params, self.settings_dict.get("POOL", {})
+        )
+        connection = self.pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        # set by the parent for new connections, reused ones keep theirs
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+from psycopg2 import extensions
+
+
+class ConnectionPool:
+    """
+    A bounded set of open connections shared by the threads of a process.
+
+    At most `max_size` connections are open, counting the checked out and
+    the idle ones; `acquire` waits up to `timeout` seconds for one to be
+    released when they are all in use, and calls `connect` when there is a
+    free slot but no idle connection. Idle connections are reused newest
+    first, after a `SELECT 1` when they have been idle longer than
+    `health_check_interval`, and closed once idle longer than `max_idle`.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4,
+        timeout: float = 10,
+        health_check_interval: float = 30,
+        max_idle: float = 300,
+    ):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_idle = max_idle
+        self.idle = deque()
+        self.slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def acquire(self, connect):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f"No database connection available within {self.timeout}s, "
+                f"all {self.max_size} are in use"
+            )
+        try:
+            connection = self.reuse()
+            if connection is None:
+                connection = connect()
+        except BaseException:
+            self.slots.release()
+            raise
+        return connection
+
+    def reuse(self):
+        while True:
+            with self._lock:
+                if not self.idle:
+                    return None
+                connection, released = self.idle.pop()
+            idle_for = time.monotonic() - released
+            if connection.closed:
+                continue
+            if idle_for > self.max_idle:
+                self.discard(connection)
+                continue
+            if idle_for > self.health_check_interval and not self.is_usable(connection):
+                self.discard(connection)
+                continue
+            return connection
+
+    def release(self, connection):
+        try:
+            if not connection.closed:
+                # never hand out a connection in the middle of a transaction
+                if connection.get_transaction_status() != (
+                    extensions.TRANSACTION_STATUS_IDLE
+                ):
+                    connection.rollback()
+                with self._lock:
+                    self.idle.append((connection, time.monotonic()))
+        except Exception:
+            self.discard(connection)
+        finally:
+            self.slots.release()
+
+    def close_idle(self):
+        """Close the idle connections, e.g. before dropping the database."""
+        with self._lock:
+            idle, self.idle = self.idle, deque()
+        for connection, _ in idle:
+            self.discard(connection)
+
+    @staticmethod
+    def is_usable(connection) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception:
+            return False
+        # the check opens a transaction unless autocommit is on
+        if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+        return True
+
+    @staticmethod
+    def discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
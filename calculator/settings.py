@@ -75,12 +75,18 @@ WSGI_APPLICATION = "calculator.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "calculator.backends.postgresql_pool",
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASSWORD"),
         "HOST": os.environ.get("DB_HOST"),
         "PORT": os.environ.get("DB_PORT"),
+        "POOL": {
+            "MAX_SIZE": int(os.environ.get("DB_POOL_MAX_SIZE", 4)),
+            "TIMEOUT": 10,
+            "HEALTH_CHECK_INTERVAL": 30,
+            "MAX_IDLE": 300,
+        },
     }
 }
 
@@ -109,7 +115,7 @@ OAUTH2_PROVIDER = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "oauth2_provider.contrib.rest_framework.OAuth2Authentication",
+        "apps.users.authentication.CachedOAuth2Authentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
@@ -178,3 +184,50 @@ SPECTACULAR_SETTINGS = {
 }
 
 LOGIN_URL = "app.users.login"
+
+RECORDS_BATCH_MAX_ITEMS = 5000
+
+RANDOM_STRING_PROVIDER = {
+    "BACKEND": "apps.records.providers.RandomOrgProvider",
+    "OPTIONS": {
+        "connect_timeout": 2,
+        "read_timeout": 3,
+        "buffer_size": 100,
+        "failure_threshold": 3,
+        "reset_timeout": 30,
+    },
+}
+
+RECORDS_OPERATION_HANDLERS = [
+    "apps.records.operations.addition",
+    "apps.records.operations.subtraction",
+    "apps.records.operations.multiplication",
+    "apps.records.operations.division",
+    "apps.records.operations.square_root",
+    "apps.records.operations.random_string",
+    "apps.records.expressions.expression",
+]
+
+OPERATION_CATALOG_MAX_AGE = 60
+
+RECORDS_EXPORT_CHUNK_SIZE = 2000
+
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+
+RECORD_PARTITIONING = False
+RECORD_PARTITIONS_AHEAD = 3
+
+RECORDS_BULK_DELETE_MAX_IDS = 10000
+
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+IDEMPOTENCY_WAIT_TIMEOUT = 5
+
+RECORDS_THROTTLE = {
+    "BACKEND": "apps.records.throttling.LocalMemoryBuckets",
+    "OPTIONS": {},
+    "CAPACITY": 100,
+    "RATE": 5,
+    "DEFAULT_COST": 1,
+    "COSTS": {"Random string": 10, "Expression": 2},
+}
@@ -0,0 +1,14 @@
+"""
+URLs of the API only deployment, see calculator.settings_api: the API
+routes of calculator.urls without the admin and the schema docs.
+"""
+from django.urls import include, path
+
+from apps.users.views import Login, Logout
+
+urlpatterns = [
+    path("o/", include("oauth2_provider.urls", namespace="oauth2_provider")),
+    path("calculator/", include("apps.records.routers")),
+    path("logout/", Logout.as_view(), name="logout"),
+    path("login/", Login.as_view(), name="login"),
+]
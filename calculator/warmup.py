@@ -0,0 +1,37 @@
+"""
+Warmup for the Lambda deployment. Zappa calls `warm` on a schedule (see the
+"api" stage in zappa_settings.json), which keeps a container warm and does
+the first request's one off work ahead of it: importing every view, opening
+the pooled database connection and loading the operation catalog and the
+operation registry.
+"""
+import os
+import time
+
+
+def warm(event=None, context=None):
+    start = time.perf_counter()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "calculator.settings_api")
+
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+    from django.db import connection
+    from django.urls import get_resolver
+
+    from apps.records.catalog import catalog
+    from apps.records.operations import registry
+
+    # resolving the patterns imports the views of every route
+    get_resolver().url_patterns
+    connection.ensure_connection()
+    try:
+        operations = len(catalog.get()[0])
+        registry.load()
+    finally:
+        # hands the connection back to the pool, open
+        connection.close()
+    return {"operations": operations, "seconds": time.perf_counter() - start}
@@ -5,11 +5,15 @@ import os
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from oauth2_provider.models import Application
 from rest_framework.test import APIClient
 
+from apps.records.catalog import catalog
 from apps.records.models import Operation
+from apps.records.operations import registry
+from apps.records.throttling import reset_buckets
 
 
 @pytest.fixture
@@ -32,6 +36,19 @@ def client():
     return APIClient()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    registry.reset()
+    catalog.reset()
+    reset_buckets()
+    yield
+    cache.clear()
+    registry.reset()
+    catalog.reset()
+    reset_buckets()
+
+
 @pytest.fixture(autouse=True)
 @pytest.mark.django_db
 def create_aplication(secrets):
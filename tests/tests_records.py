@@ -1,19 +1,150 @@
+import base64
+import datetime
 import json
 import math
+import os
+import random
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
 from unittest.mock import patch
 
+import httpx
+import psycopg2
 import pytest
+import requests
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from psycopg2 import extensions
 from rest_framework import status
-
-from apps.records.models import Operation, Record
+from rest_framework.test import APIClient
+
+from apps.records import cache as records_cache
+from apps.records import (
+    engine,
+    expressions,
+    idempotency,
+    partitioning,
+    providers,
+    throttling,
+)
+from apps.records.catalog import catalog
+from apps.records.models import ArchivedRecord, Operation, Record, UsageSummary
+from apps.records.operations import OperationHandler, registry
+from calculator import warmup
+from calculator.backends.postgresql_pool.pool import ConnectionPool
 
 
 @pytest.mark.django_db
 def test_addition(get_bearer_token, client, data_operations):
+    operation = Operation.objects.create(type="Addition", cost=10)
+    data_operations["operation"] = operation.id
+    json_data = json.dumps(data_operations)
+
+    response = client.post(
+        reverse("record-list"),
+        data=json_data,
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"result": 4}
+
+
+@pytest.mark.django_db
+def test_user_cache_hits(get_bearer_token, client, data_operations):
+    operation = Operation.objects.create(type="Addition", cost=10)
+    data_operations["operation"] = operation.id
+    records_cache.stats.reset()
+
+    for _ in range(3):
+        client.post(
+            reverse("record-list"),
+            data=json.dumps(data_operations),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            content_type="application/json",
+        )
+
+    assert records_cache.stats.misses == 1
+    assert records_cache.stats.hits == 2
+    assert cache.get(records_cache.user_key("admin")) is not None
+
+    user = get_user_model().objects.get(username="admin")
+    user.save()
+
+    assert cache.get(records_cache.user_key("admin")) is None
+
+
+@pytest.mark.django_db
+def test_operation_registry_rebinds_on_save(get_bearer_token, client, data_operations):
+    operation = Operation.objects.create(type="Addition", cost=10)
+    data_operations["operation"] = operation.id
+    json_data = json.dumps(data_operations)
+
+    client.post(
+        reverse("record-list"),
+        data=json_data,
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+    assert registry.get(operation.id).cost == 10
+
+    operation.cost = 20
+    operation.save()
+    assert registry.entries is None
+
+    client.post(
+        reverse("record-list"),
+        data=json_data,
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+    assert Record.objects.order_by("-id").first().amount == 20
+
+
+@pytest.mark.django_db
+def test_operation_list_etag(get_bearer_token, client, django_assert_num_queries):
     Operation.objects.create(type="Addition", cost=10)
-    data_operations["operation"] = 1
+    response = client.get(
+        reverse("operation-list"), HTTP_AUTHORIZATION=get_bearer_token
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "private" in response["Cache-Control"]
+    etag = response["ETag"]
+
+    # the token and the catalog are both served from memory
+    with django_assert_num_queries(0):
+        response = client.get(
+            reverse("operation-list"),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+
+    Operation.objects.create(type="Subtraction", cost=10)
+    response = client.get(
+        reverse("operation-list"),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        HTTP_IF_NONE_MATCH=etag,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+    assert len(response.json()) == Operation.objects.count()
+
+
+@pytest.mark.django_db
+def test_registered_operation_is_pluggable(get_bearer_token, client, data_operations):
+    operation = Operation.objects.create(type="Power", cost=10)
+    data_operations["operation"] = operation.id
     json_data = json.dumps(data_operations)
 
     response = client.post(
@@ -22,6 +153,18 @@ def test_addition(get_bearer_token, client, data_operations):
         HTTP_AUTHORIZATION=get_bearer_token,
         content_type="application/json",
     )
+    assert response.json() == {"error": 'Operation "Power" not supported.'}
+
+    registry.register(OperationHandler("Power", lambda x, y: x**y))
+    try:
+        response = client.post(
+            reverse("record-list"),
+            data=json_data,
+            HTTP_AUTHORIZATION=get_bearer_token,
+            content_type="application/json",
+        )
+    finally:
+        del registry.handlers["Power"]
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"result": 4}
@@ -131,24 +274,182 @@ def test_random_string(get_bearer_token, client, data_operations):
 
 
 @pytest.mark.django_db
-def test_random_string_mock(get_bearer_token, client, data_operations):
+def test_random_string_mock(get_bearer_token, client, data_operations, settings):
+    settings.RANDOM_STRING_PROVIDER = {
+        "BACKEND": "apps.records.providers.StaticRandomStringProvider",
+        "OPTIONS": {"value": "randomstring"},
+    }
     operation = Operation.objects.create(type="Random string", cost=60)
     data_operations["operation"] = operation.id
     data_operations["user"] = get_user_model().objects.select_related().first().id
     json_data = json.dumps(data_operations)
 
-    with patch("apps.records.views.requests.get") as mock_get:
-        mock_get.return_value.status_code = status.HTTP_200_OK
-        mock_get.return_value.text = "randomstring"
+    response = client.post(
+        reverse("record-list"),
+        data=json_data,
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["result"] == "randomstring"
+    assert providers.get_provider().calls == [(2, 2)]
+
+
+@pytest.mark.django_db
+def test_async_record_view(get_bearer_token, client, data_operations, settings):
+    settings.RANDOM_STRING_PROVIDER = {
+        "BACKEND": "apps.records.providers.StaticRandomStringProvider",
+        "OPTIONS": {"value": "randomstring"},
+    }
+    addition = Operation.objects.create(type="Addition", cost=10)
+    random_string = Operation.objects.create(type="Random string", cost=60)
+
+    for operation, result in ((addition, 4), (random_string, "randomstring")):
+        data_operations["operation"] = operation.id
         response = client.post(
-            reverse("record-list"),
-            data=json_data,
+            reverse("async-record"),
+            data=json.dumps(data_operations),
             HTTP_AUTHORIZATION=get_bearer_token,
             content_type="application/json",
         )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["result"] == result
+    assert get_user_model().objects.get(username="admin").balance == 130
 
+    response = client.get(reverse("async-record"), HTTP_AUTHORIZATION=get_bearer_token)
     assert response.status_code == status.HTTP_200_OK
-    assert response.json()["result"] == "randomstring"
+    assert sorted(record["operation_type"] for record in response.json()) == [
+        "Addition",
+        "Random string",
+    ]
+    response = client.get(
+        reverse("async-record"),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        HTTP_IF_NONE_MATCH=response["ETag"],
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = client.get(
+        reverse("async-record"), {"page_size": 1}, HTTP_AUTHORIZATION=get_bearer_token
+    )
+    assert len(response.json()["results"]) == 1
+    assert response.json()["next"]
+
+    data_operations["operation"] = 9999
+    response = client.post(
+        reverse("async-record"),
+        data=json.dumps(data_operations),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.get(reverse("async-record"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_random_org_provider_async_fallback():
+    provider = providers.RandomOrgProvider(buffer_size=0)
+    clients = []
+    async_client = provider.async_client
+    with patch.object(
+        httpx.AsyncClient, "get", side_effect=httpx.ConnectError("down")
+    ), patch.object(
+        provider,
+        "async_client",
+        side_effect=lambda: clients.append(async_client()) or clients[-1],
+    ):
+        value = async_to_sync(provider.aget_random_string)(2, 5)
+
+    assert len(value.split()) == 2
+    assert provider.breaker.failures == 1
+    # the client is closed with the call that opened it
+    assert len(clients) == 1 and clients[0].is_closed
+
+
+@pytest.mark.django_db
+def test_random_org_provider_buffer():
+    provider = providers.RandomOrgProvider(buffer_size=4)
+    with patch.object(provider.session, "get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.text = "aa\nbb\ncc\ndd\n"
+        provider.refill(2)
+
+        assert provider.get_random_string(2, 2) == "aa\nbb\n"
+        assert mock_get.call_count == 1
+        _, kwargs = mock_get.call_args
+        assert kwargs["timeout"] == provider.timeout
+
+
+@pytest.mark.django_db
+def test_random_org_provider_circuit_breaker():
+    provider = providers.RandomOrgProvider(
+        buffer_size=0, failure_threshold=2, reset_timeout=60
+    )
+    with patch.object(
+        provider.session, "get", side_effect=requests.ConnectionError
+    ) as mock_get:
+        for _ in range(5):
+            strings = provider.get_random_string(3, 5).split()
+            assert len(strings) == 3
+            assert all(len(value) == 5 for value in strings)
+
+    assert mock_get.call_count == 2
+    assert not provider.breaker.allow()
+
+
+@pytest.mark.django_db
+def test_random_org_provider_client_error():
+    provider = providers.RandomOrgProvider(buffer_size=0, failure_threshold=1)
+    with patch.object(provider.session, "get") as mock_get:
+        mock_get.return_value.status_code = 400
+        mock_get.return_value.text = "Error: The length must be in [1,32]\n"
+        with pytest.raises(providers.RandomStringRequestError, match="length"):
+            provider.get_random_string(3, 40)
+
+        # random.org answered, the breaker stays closed
+        assert provider.breaker.failures == 0
+        mock_get.return_value.status_code = 503
+        assert len(provider.get_random_string(3, 5).split()) == 3
+        assert not provider.breaker.allow()
+
+    with pytest.raises(providers.RandomStringRequestError):
+        providers.LocalRandomStringProvider().generate(63, 1)
+    assert len(providers.LocalRandomStringProvider().generate(62, 1)) == 62
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "num1, num2, error",
+    [
+        (0, 5, "num1 must be between 1 and 10000"),
+        (10001, 5, "num1 must be between 1 and 10000"),
+        (5, 0, "num2 must be between 1 and 32"),
+        (5, 33, "num2 must be between 1 and 32"),
+        (100, 1, "Only 62 unique strings of length 1 exist"),
+    ],
+)
+def test_random_string_limits(
+    get_bearer_token, client, data_operations, settings, num1, num2, error
+):
+    settings.RANDOM_STRING_PROVIDER = {
+        "BACKEND": "apps.records.providers.LocalRandomStringProvider"
+    }
+    operation = Operation.objects.create(type="Random string", cost=60)
+    data_operations.update(operation=operation.id, num1=num1, num2=num2)
+
+    response = client.post(
+        reverse("record-list"),
+        data=json.dumps(data_operations),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert error in response.json()["error"]
+    assert not Record.objects.exists()
 
 
 @pytest.mark.django_db
@@ -211,7 +512,9 @@ def test_not_found(get_bearer_token, client, data_operations):
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert response.json() == {"error": "User does not exits!"}
 
-    data_operations["username"] = get_user_model().objects.select_related().first().username
+    data_operations["username"] = (
+        get_user_model().objects.select_related().first().username
+    )
     data_operations["operation"] = 10000
     json_data = json.dumps(data_operations)
 
@@ -244,6 +547,135 @@ def test_insufficient_balance(get_bearer_token, client, data_operations):
     assert response.json() == {"error": "Insufficient balance"}
 
 
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_creates_do_not_lose_debits(
+    get_bearer_token, data_operations, settings
+):
+    # this is about the debits, keep the rate limit out of the way
+    settings.RECORDS_THROTTLE = {**settings.RECORDS_THROTTLE, "CAPACITY": 1000}
+    operation = Operation.objects.create(type="Addition", cost=1)
+    user = get_user_model().objects.get(username="admin")
+    user.balance = 150
+    user.save()
+    data_operations["operation"] = operation.id
+    json_data = json.dumps(data_operations)
+
+    def post(_):
+        try:
+            response = APIClient().post(
+                reverse("record-list"),
+                data=json_data,
+                HTTP_AUTHORIZATION=get_bearer_token,
+                content_type="application/json",
+            )
+            return response.status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        status_codes = list(executor.map(post, range(200)))
+
+    user.refresh_from_db()
+    assert status_codes.count(status.HTTP_200_OK) == 150
+    assert status_codes.count(status.HTTP_400_BAD_REQUEST) == 50
+    assert user.balance == 0
+    assert Record.objects.filter(user=user).count() == 150
+    assert sorted(Record.objects.values_list("user_balance", flat=True)) == list(
+        range(150)
+    )
+
+
+@pytest.mark.django_db
+def test_batch(get_bearer_token, client):
+    addition = Operation.objects.create(type="Addition", cost=10)
+    division = Operation.objects.create(type="Division", cost=20)
+    items = [
+        {"operation": addition.id, "num1": 1, "num2": 2},
+        {"operation": division.id, "num1": 1, "num2": 0},
+        {"operation": division.id, "num1": 8, "num2": 2},
+        {"operation": 10000, "num1": 1, "num2": 2},
+        {"operation": addition.id, "num1": "a", "num2": 2},
+    ]
+
+    response = client.post(
+        reverse("record-batch"),
+        data=json.dumps(items),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "results": [
+            {"result": 3},
+            {"error": "Division by zero not allowed"},
+            {"result": 4.0},
+            {"error": "Operation does not exits!"},
+            {"error": "num1 and num2 must be integers or floats"},
+        ],
+        "user_balance": 170,
+    }
+    user = get_user_model().objects.get(username="admin")
+    assert user.balance == 170
+    assert list(
+        Record.objects.filter(user=user)
+        .order_by("id")
+        .values_list("amount", "user_balance", "operation_response")
+    ) == [(10, 190, "3"), (20, 170, "4.0")]
+
+
+@pytest.mark.django_db
+def test_batch_insufficient_balance(get_bearer_token, client):
+    operation = Operation.objects.create(type="Addition", cost=150)
+    items = [{"operation": operation.id, "num1": 1, "num2": 2}] * 2
+
+    response = client.post(
+        reverse("record-batch"),
+        data=json.dumps(items),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"error": "Insufficient balance"}
+    assert not Record.objects.exists()
+
+
+@pytest.mark.django_db
+def test_engine_matches_scalar_operations():
+    scalar_operations = {
+        "Addition": lambda x, y: x + y,
+        "Subtraction": lambda x, y: x - y,
+        "Multiplication": lambda x, y: x * y,
+        "Division": lambda x, y: x / y,
+        "Square root": lambda x, y: round(math.sqrt(x), 2),
+        "Random string": lambda x, y: f"{x}-{y}",
+    }
+    rng = random.Random(0)
+    types, xs, ys = [], [], []
+    for _ in range(engine.VECTORIZE_MIN_ITEMS * 2):
+        types.append(rng.choice(list(scalar_operations)))
+        xs.append(rng.choice([rng.randint(0, 100), rng.uniform(0, 100), 2**40]))
+        ys.append(rng.choice([rng.randint(0, 100), rng.uniform(0, 100), 0]))
+    types += ["Square root", "Square root", "Division"]
+    xs += [0.015625, -4, 3]
+    ys += [0, 0, 0.0]
+
+    results, errors = engine.evaluate(types, xs, ys, scalar_operations)
+
+    for operation_type, num1, num2, result, error in zip(
+        types, xs, ys, results, errors
+    ):
+        if operation_type == "Division" and num2 == 0:
+            assert error == engine.DIVISION_BY_ZERO
+        elif operation_type == "Square root" and num1 < 0:
+            assert error == engine.NEGATIVE_SQUARE_ROOT
+        else:
+            expected = scalar_operations[operation_type](num1, num2)
+            assert error is None
+            assert result == expected and type(result) is type(expected)
+
+
 @pytest.mark.django_db
 def test_wrong_data_type(get_bearer_token, client, data_operations):
     data_operations["num1"] = "a"
@@ -263,7 +695,8 @@ def test_wrong_data_type(get_bearer_token, client, data_operations):
 
 @pytest.mark.django_db
 def test_wrong_data_type_random_string(get_bearer_token, client, data_operations):
-    data_operations["operation"] = 6
+    operation = Operation.objects.create(type="Random string", cost=60)
+    data_operations["operation"] = operation.id
     data_operations["num1"] = 1.2
     data_operations["num2"] = 2.1
     json_data = json.dumps(data_operations)
@@ -303,6 +736,85 @@ def test_record_list(get_bearer_token, client, user_operation):
     assert response.json()[0]["operation_response"] == "60"
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+def test_record_list_cursor_pagination(get_bearer_token, client, user_operation):
+    records = [
+        Record.objects.create(
+            user=user_operation["user"],
+            operation=user_operation["operation"],
+            amount=10,
+            user_balance=190,
+            operation_response=str(index),
+        )
+        for index in range(25)
+    ]
+    expected_ids = [record.id for record in reversed(records)]
+
+    response = client.get(
+        reverse("record-list"),
+        {"page_size": 10},
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+    first_page = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert [record["id"] for record in first_page["results"]] == expected_ids[:10]
+    assert first_page["previous"] is None
+
+    response = client.get(
+        first_page["next"],
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+    second_page = response.json()
+    assert [record["id"] for record in second_page["results"]] == expected_ids[10:20]
+
+    response = client.get(
+        second_page["next"],
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+    last_page = response.json()
+    assert [record["id"] for record in last_page["results"]] == expected_ids[20:]
+    assert last_page["next"] is None
+
+    response = client.get(
+        second_page["previous"],
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+    assert response.json()["results"] == first_page["results"]
+    assert response.json()["previous"] is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        base64.urlsafe_b64encode(
+            json.dumps({"d": "2023-01-01T00:00:00+00:00", "i": 1}).encode()
+        ).decode(),
+        base64.urlsafe_b64encode(
+            json.dumps({"d": "2023-01-01T00:00:00", "i": 10**30}).encode()
+        ).decode(),
+        base64.urlsafe_b64encode(
+            json.dumps({"d": "2023-01-01T00:00:00", "i": 0}).encode()
+        ).decode(),
+    ],
+)
+def test_record_list_invalid_cursor(get_bearer_token, client, cursor):
+    response = client.get(
+        reverse("record-list"),
+        {"cursor": cursor},
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("user_operation", [("Random string", 60)], indirect=True)
 def test_destroy(get_bearer_token, client, user_operation):
@@ -324,6 +836,152 @@ def test_destroy(get_bearer_token, client, user_operation):
     assert response.json() == {"message": "Record deleted"}
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+def test_record_list_etag(
+    get_bearer_token, client, user_operation, django_assert_num_queries
+):
+    def create_record():
+        return Record.objects.create(
+            user=user_operation["user"],
+            operation=user_operation["operation"],
+            amount=10,
+            user_balance=190,
+            operation_response="4",
+        )
+
+    def get_list(etag, **params):
+        return client.get(
+            reverse("record-list"),
+            params,
+            HTTP_AUTHORIZATION=get_bearer_token,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+    first_record = create_record()
+    response = get_list("")
+    assert response.status_code == status.HTTP_200_OK
+    assert "no-cache" in response["Cache-Control"]
+    etag = response["ETag"]
+
+    # only the version query: the token is cached and no records are fetched
+    with django_assert_num_queries(1):
+        response = get_list(etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert get_list(etag, page_size=5).status_code == status.HTTP_200_OK
+
+    create_record()
+    response = get_list(etag)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response["ETag"]
+
+    # a record stamped earlier than the newest one, by a server whose clock
+    # is behind, still changes the version
+    skewed = create_record()
+    Record.objects.filter(pk=skewed.pk).update(
+        creation_date=first_record.creation_date - datetime.timedelta(minutes=5)
+    )
+    response = get_list(etag)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response["ETag"]
+
+    # deleting an older record leaves the newest id as it was
+    client.delete(
+        reverse("record-detail", args=[first_record.id]),
+        HTTP_AUTHORIZATION=get_bearer_token,
+    )
+    response = get_list(etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+def test_record_export(get_bearer_token, client, user_operation):
+    Record.objects.bulk_create(
+        Record(
+            user=user_operation["user"],
+            operation=user_operation["operation"],
+            amount=10,
+            user_balance=190,
+            operation_response=str(index),
+        )
+        for index in range(30)
+    )
+    Record.objects.filter(operation_response="0").update(status=False)
+
+    response = client.get(reverse("record-export"), HTTP_AUTHORIZATION=get_bearer_token)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert len(rows) == 29
+    assert rows[0]["operation_type"] == "Addition"
+    assert [row["id"] for row in rows] == sorted(
+        (row["id"] for row in rows), reverse=True
+    )
+
+    response = client.get(
+        reverse("record-export"),
+        {"file_format": "csv"},
+        HTTP_AUTHORIZATION=get_bearer_token,
+    )
+    assert response["Content-Type"] == "text/csv"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == (
+        "id,creation_date,amount,user_balance,operation_response,operation_type"
+    )
+    assert len(lines) == 30
+
+    response = client.get(
+        reverse("record-export"),
+        {"file_format": "xml"},
+        HTTP_AUTHORIZATION=get_bearer_token,
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+def test_records_scoped_to_user(get_bearer_token, client, user_operation):
+    other_user = get_user_model().objects.create_user(
+        username="other", password="123456"
+    )
+    own_record = Record.objects.create(
+        user=user_operation["user"],
+        operation=user_operation["operation"],
+        amount=10,
+        user_balance=190,
+        operation_response="4",
+    )
+    other_record = Record.objects.create(
+        user=other_user,
+        operation=user_operation["operation"],
+        amount=10,
+        user_balance=190,
+        operation_response="4",
+    )
+
+    response = client.get(
+        reverse("record-list"),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+
+    assert [record["id"] for record in response.json()] == [own_record.id]
+
+    response = client.delete(
+        reverse("record-detail", kwargs={"pk": other_record.id}),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    other_record.refresh_from_db()
+    assert other_record.status
+
+
 @pytest.mark.django_db
 def test_destroy_not_found(get_bearer_token, client):
     response = client.delete(
@@ -336,6 +994,603 @@ def test_destroy_not_found(get_bearer_token, client):
     assert response.json() == {"error": "Not found record"}
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+def test_record_partitions(get_bearer_token, client, user_operation):
+    user, operation = user_operation["user"], user_operation["operation"]
+    this_month = partitioning.month_start(datetime.date.today())
+    old_month = partitioning.add_months(this_month, -3)
+    old = Record.objects.create(
+        user=user,
+        operation=operation,
+        amount=10,
+        user_balance=0,
+        operation_response="1",
+    )
+    Record.objects.filter(pk=old.pk).update(creation_date=old_month)
+
+    out = StringIO()
+    call_command("record_partitions", convert=True, months_ahead=1, stdout=out)
+    assert "Partitioned the record table." in out.getvalue()
+    with connection.cursor() as cursor:
+        assert partitioning.is_partitioned(cursor)
+        assert [month for _, month in partitioning.partitions(cursor)] == [
+            partitioning.add_months(old_month, offset) for offset in range(5)
+        ]
+
+    response = client.post(
+        reverse("record-list"),
+        data=json.dumps(
+            {"operation": operation.id, "num1": 2, "num2": 2, "username": user.username}
+        ),
+        HTTP_AUTHORIZATION=get_bearer_token,
+        content_type="application/json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    new = Record.objects.latest("id")
+    assert new.id > old.id
+
+    plan = Record.objects.filter(
+        creation_date__gte=this_month,
+        creation_date__lt=partitioning.add_months(this_month, 1),
+    ).explain()
+    assert partitioning.partition_name(this_month) in plan
+    assert partitioning.partition_name(old_month) not in plan
+
+    out = StringIO()
+    call_command("record_partitions", months_ahead=2, stdout=out)
+    next_months = partitioning.add_months(this_month, 2)
+    assert out.getvalue() == f"Created {partitioning.partition_name(next_months)}.\n"
+
+    out = StringIO()
+    call_command("record_partitions", f"--detach-before={this_month:%Y-%m}", stdout=out)
+    assert f"Detached {partitioning.partition_name(old_month)}." in out.getvalue()
+    assert list(Record.objects.values_list("id", flat=True)) == [new.id]
+
+    with connection.cursor() as cursor:
+        partitioning.unpartition_table(cursor)
+        assert not partitioning.is_partitioned(cursor)
+    record = Record.objects.create(
+        user=user,
+        operation=operation,
+        amount=10,
+        user_balance=0,
+        operation_response="4",
+    )
+    assert record.id > new.id
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_compact_records(user_operation, dry_run):
+    user, operation = user_operation["user"], user_operation["operation"]
+    records = [
+        Record.objects.create(
+            user=user,
+            operation=operation,
+            amount=10,
+            user_balance=0,
+            operation_response=str(index),
+            status=index % 3 != 0,
+        )
+        for index in range(6)
+    ]
+    old = datetime.datetime.now() - datetime.timedelta(days=60)
+    Record.objects.filter(pk=records[1].pk).update(creation_date=old)
+    version = Record.objects.list_version(user.id)
+
+    out = StringIO()
+    call_command(
+        "compact_records", batch_size=2, older_than=30, dry_run=dry_run, stdout=out
+    )
+
+    if dry_run:
+        assert out.getvalue() == "records: would archive 3 rows\n"
+        assert Record.objects.count() == 6
+        return
+    assert "records: archived 3 rows" in out.getvalue()
+    archived = [records[0].id, records[1].id, records[3].id]
+    assert sorted(ArchivedRecord.objects.values_list("id", flat=True)) == archived
+    assert list(Record.objects.order_by("id").values_list("id", flat=True)) == [
+        records[2].id,
+        records[4].id,
+        records[5].id,
+    ]
+    assert ArchivedRecord.objects.get(id=records[1].id).operation_response == "1"
+    # an active record left the list
+    assert Record.objects.list_version(user.id) != version
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+def test_record_bulk_delete(get_bearer_token, client, user_operation):
+    user, operation = user_operation["user"], user_operation["operation"]
+    other = get_user_model().objects.create_user(username="other", password="x")
+    records = [
+        Record.objects.create(
+            user=owner,
+            operation=operation,
+            amount=10,
+            user_balance=0,
+            operation_response=str(index),
+        )
+        for index, owner in enumerate([user, user, user, user, other])
+    ]
+    for day, record in zip([1, 2, 3, 3, 2], records):
+        Record.objects.filter(pk=record.pk).update(
+            creation_date=datetime.datetime(2026, 1, day, 12)
+        )
+    deletions = user.record_deletions
+
+    def bulk_delete(data):
+        return client.post(
+            reverse("record-bulk-destroy"),
+            data=json.dumps(data),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            content_type="application/json",
+        )
+
+    # the other user's record is not touched
+    response = bulk_delete({"ids": [records[0].id, records[4].id]})
+    assert response.json() == {"deleted": 1}
+
+    with CaptureQueriesContext(connection) as queries:
+        response = bulk_delete({"date_from": "2026-01-01", "date_to": "2026-01-02"})
+    assert response.json() == {"deleted": 1}
+    assert len([q for q in queries if "records_record" in q["sql"]]) == 1
+
+    # a datetime bound includes that instant
+    response = bulk_delete(
+        {"date_from": "2026-01-03T00:00:00", "date_to": "2026-01-03T12:00:00"}
+    )
+    assert response.json() == {"deleted": 2}
+    response = bulk_delete({"ids": [records[1].id]})
+    assert response.json() == {"deleted": 0}
+
+    assert list(Record.objects.filter(status=True).values_list("id", flat=True)) == [
+        records[4].id
+    ]
+    user.refresh_from_db()
+    assert user.record_deletions == deletions + 3
+
+    for data in [
+        {},
+        {"ids": [1], "date_to": "2026-01-01"},
+        {"ids": []},
+        {"ids": ["1"]},
+        {"date_from": "yesterday"},
+        {"date_to": "2026-02-30"},
+    ]:
+        response = bulk_delete(data)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, data
+        assert "error" in response.json()
+
+
+@pytest.mark.django_db
+def test_record_usage_summary(get_bearer_token, client, data_operations):
+    addition = Operation.objects.create(type="Addition", cost=10)
+    subtraction = Operation.objects.create(type="Subtraction", cost=5)
+    user = get_user_model().objects.get(username="admin")
+
+    def post(name, data):
+        return client.post(
+            reverse(name),
+            data=json.dumps(data),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            content_type="application/json",
+        )
+
+    def summary():
+        response = client.get(
+            reverse("record-summary"), HTTP_AUTHORIZATION=get_bearer_token
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    data_operations["operation"] = addition.id
+    post("record-list", data_operations)
+    post(
+        "record-batch",
+        [
+            {"operation": addition.id, "num1": 1, "num2": 1},
+            {"operation": subtraction.id, "num1": 1, "num2": 1},
+            {"operation": subtraction.id, "num1": 3, "num2": 1},
+        ],
+    )
+    result = summary()
+    assert (result["count"], result["credits"]) == (4, 30)
+    assert result["last_activity"] is not None
+    assert [
+        (item["operation_type"], item["count"], item["credits"])
+        for item in result["operations"]
+    ] == [("Addition", 2, 20), ("Subtraction", 2, 10)]
+
+    records = Record.objects.order_by("id")
+    client.delete(
+        reverse("record-detail", args=[records[0].id]),
+        HTTP_AUTHORIZATION=get_bearer_token,
+    )
+    post("record-bulk-destroy", {"ids": [records[2].id, records[3].id]})
+    # archives the one record left active as well
+    call_command("compact_records", older_than=0, stdout=StringIO())
+    result = summary()
+    assert (result["count"], result["credits"]) == (0, 0)
+    assert [item["count"] for item in result["operations"]] == [0, 0]
+
+    out = StringIO()
+    call_command("rebuild_usage_summary", check=True, stdout=out)
+    assert out.getvalue() == "usage summary: up to date\n"
+
+    UsageSummary.objects.filter(user=user, operation=addition).update(count=7)
+    with pytest.raises(CommandError):
+        call_command("rebuild_usage_summary", check=True, stdout=StringIO())
+    call_command("rebuild_usage_summary", stdout=StringIO())
+    call_command("rebuild_usage_summary", check=True, stdout=StringIO())
+    assert summary()["count"] == 0
+
+
+@pytest.mark.django_db
+def test_expression_plan():
+    plan = expressions.compile_expression("sqrt(a + b) * c")
+    assert expressions.compile_expression("  sqrt( a+b )*c ") is plan
+    assert plan.variables == {"a", "b", "c"}
+    assert plan.operations == {"Addition": 1, "Square root": 1, "Multiplication": 1}
+    costs = {"Addition": 10, "Square root": 20, "Multiplication": 5}
+    assert plan.cost(costs) == 35
+    assert plan.evaluate({"a": 7, "b": 9, "c": 2}, registry.handlers) == 8.0
+    assert (
+        expressions.compile_expression("-a - -2").evaluate({"a": 1}, registry.handlers)
+        == 1
+    )
+
+    for expression in [
+        "a ** 2",
+        "__import__('os')",
+        "a.b",
+        "(a",
+        "1 2",
+        "1e400",
+        "a",
+        "-5",
+    ]:
+        with pytest.raises(expressions.ExpressionError):
+            expressions.compile_expression(expression)
+    with pytest.raises(expressions.ExpressionError):
+        expressions.compile_expression("+".join(["1"] * 40))
+    with pytest.raises(expressions.ExpressionError, match="Division by zero"):
+        expressions.compile_expression("a / (b - b)").evaluate(
+            {"a": 1, "b": 2}, registry.handlers
+        )
+
+
+@pytest.mark.django_db
+def test_expression_create(get_bearer_token, client):
+    Operation.objects.create(type="Addition", cost=10)
+    Operation.objects.create(type="Multiplication", cost=5)
+    Operation.objects.create(type="Square root", cost=20)
+    expression = Operation.objects.create(type="Expression", cost=1)
+
+    def create(data):
+        return client.post(
+            reverse("record-list"),
+            data=json.dumps({"operation": expression.id, "username": "admin", **data}),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            content_type="application/json",
+        )
+
+    response = create(
+        {"expression": "sqrt(a + b) * c", "variables": {"a": 7, "b": 9, "c": 2}}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"result": 8.0, "cost": 35}
+    record = Record.objects.get()
+    assert (record.operation_id, record.amount) == (expression.id, 35)
+    assert get_user_model().objects.get(username="admin").balance == 165
+
+    for data, error in [
+        ({"num1": 1, "num2": 2}, "Expression operations take an expression"),
+        ({"expression": "a - b", "variables": {"a": 1, "b": 2}}, "not supported"),
+        ({"expression": "a + b", "variables": {"a": 1}}, "Missing variables: b"),
+        ({"expression": "a + b", "variables": {"a": 1, "b": "2"}}, "integers"),
+        ({"expression": "sqrt(0 - a)", "variables": {"a": 1}}, "not supported"),
+        ({"expression": "sqrt(a * 0 + -1)", "variables": {"a": 1}}, "negative"),
+        ({"expression": "a + 1; b"}, "Invalid expression"),
+        ({"expression": "a", "variables": {"a": 1}}, "at least one operation"),
+    ]:
+        response = create(data)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, data
+        assert error in response.json()["error"]
+    assert Record.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+def test_create_idempotency_key(
+    get_bearer_token, client, data_operations, user_operation, settings
+):
+    data_operations["operation"] = user_operation["operation"].id
+
+    def create(key, data):
+        return client.post(
+            reverse("record-list"),
+            data=json.dumps(data),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            HTTP_IDEMPOTENCY_KEY=key,
+            content_type="application/json",
+        )
+
+    first = create("key-1", data_operations)
+    retry = create("key-1", data_operations)
+    assert first.status_code == retry.status_code == status.HTTP_200_OK
+    assert retry.json() == first.json() == {"result": 4}
+    assert retry["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first
+    assert Record.objects.count() == 1
+    assert get_user_model().objects.get(username="admin").balance == 190
+
+    response = create("key-1", {**data_operations, "num2": 3})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert create("", data_operations).status_code == status.HTTP_400_BAD_REQUEST
+
+    # errors are released, the retry does the work
+    with patch.object(
+        Record.objects, "debit_and_create", side_effect=RuntimeError
+    ), pytest.raises(RuntimeError):
+        create("key-2", data_operations)
+    assert create("key-2", data_operations).json() == {"result": 4}
+    assert Record.objects.count() == 2
+
+    # client errors aren't stored either: the retry after a top up succeeds
+    get_user_model().objects.filter(username="admin").update(balance=0)
+    cache.clear()
+    response = create("key-4", data_operations)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    get_user_model().objects.filter(username="admin").update(balance=100)
+    cache.clear()
+    response = create("key-4", data_operations)
+    assert response.status_code == status.HTTP_200_OK
+    assert "Idempotent-Replayed" not in response
+    assert Record.objects.count() == 3
+
+    # a duplicate waits for the request holding the key
+    user_id = user_operation["user"].id
+    name = idempotency.cache_key(user_id, "key-3")
+    claim = {
+        "fingerprint": idempotency.fingerprint(
+            "POST", reverse("record-list"), data_operations
+        )
+    }
+    cache.set(name, claim)
+    settings.IDEMPOTENCY_WAIT_TIMEOUT = 0.2
+    response = create("key-3", data_operations)
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    timer = threading.Timer(
+        0.1, cache.set, [name, {**claim, "status": 200, "data": {"result": 4}}]
+    )
+    timer.start()
+    response = create("key-3", data_operations)
+    timer.join()
+    assert response.json() == {"result": 4}
+    assert response["Idempotent-Replayed"] == "true"
+    assert Record.objects.count() == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("user_operation", [("Addition", 10)], indirect=True)
+def test_async_create_idempotency_key(
+    get_bearer_token, client, data_operations, user_operation
+):
+    data_operations["operation"] = user_operation["operation"].id
+
+    def create(key, data, url=reverse("async-record")):
+        return client.post(
+            url,
+            data=json.dumps(data),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            HTTP_IDEMPOTENCY_KEY=key,
+            content_type="application/json",
+        )
+
+    first = create("key-1", data_operations)
+    retry = create("key-1", data_operations)
+    assert first.status_code == retry.status_code == status.HTTP_200_OK
+    assert retry.json() == first.json() == {"result": 4}
+    assert retry["Idempotent-Replayed"] == "true"
+    assert Record.objects.count() == 1
+    assert get_user_model().objects.get(username="admin").balance == 190
+
+    response = create("key-1", {**data_operations, "num2": 3})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert create("", data_operations).status_code == status.HTTP_400_BAD_REQUEST
+    # the same key on the sync path is another request
+    response = create("key-1", data_operations, reverse("record-list"))
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert Record.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "backend",
+    [
+        "apps.records.throttling.LocalMemoryBuckets",
+        "apps.records.throttling.CacheBuckets",
+    ],
+)
+def test_operation_rate_throttle(get_bearer_token, client, settings, backend):
+    addition = Operation.objects.create(type="Addition", cost=1)
+    random_string = Operation.objects.create(type="Random string", cost=1)
+    settings.RANDOM_STRING_PROVIDER = {
+        "BACKEND": "apps.records.providers.StaticRandomStringProvider"
+    }
+    settings.RECORDS_THROTTLE = {
+        "BACKEND": backend,
+        "CAPACITY": 10,
+        "RATE": 0.001,
+        "DEFAULT_COST": 1,
+        "COSTS": {"Random string": 5},
+    }
+
+    def post(name, data):
+        return client.post(
+            reverse(name),
+            data=json.dumps(data),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            content_type="application/json",
+        )
+
+    item = {"operation": addition.id, "num1": 1, "num2": 2, "username": "admin"}
+    assert post("record-list", item).status_code == status.HTTP_200_OK
+    assert post("record-batch", [item] * 3).status_code == status.HTTP_200_OK
+    # 6 tokens left, the random string takes 5
+    random_item = {**item, "operation": random_string.id, "num2": 4}
+    assert post("record-list", random_item).status_code == status.HTTP_200_OK
+    assert post("record-list", random_item).status_code == (
+        status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    assert post("record-list", item).status_code == status.HTTP_200_OK
+    response = post("record-list", item)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response["Retry-After"]) > 0
+
+    # reads are not limited
+    response = client.get(reverse("record-list"), HTTP_AUTHORIZATION=get_bearer_token)
+    assert response.status_code == status.HTTP_200_OK
+    assert Record.objects.count() == 6
+
+
+@pytest.mark.django_db
+def test_operation_rate_throttle_over_capacity(get_bearer_token, client, settings):
+    addition = Operation.objects.create(type="Addition", cost=1)
+    settings.RECORDS_THROTTLE = {
+        "BACKEND": "apps.records.throttling.LocalMemoryBuckets",
+        "CAPACITY": 10,
+        "RATE": 0.001,
+        "DEFAULT_COST": 1,
+        "COSTS": {},
+    }
+
+    def post(name, data):
+        return client.post(
+            reverse(name),
+            data=json.dumps(data),
+            HTTP_AUTHORIZATION=get_bearer_token,
+            content_type="application/json",
+        )
+
+    item = {"operation": addition.id, "num1": 1, "num2": 2, "username": "admin"}
+    # a batch above the capacity passes on a full bucket and is charged in full
+    assert post("record-batch", [item] * 15).status_code == status.HTTP_200_OK
+    response = post("record-batch", [item] * 15)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    # 5 tokens owed and 10 needed
+    assert int(response["Retry-After"]) == 15000
+    # the async view takes from the same bucket
+    response = post("async-record", item)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response["Retry-After"]) == 6000
+    assert Record.objects.count() == 15
+
+
+@pytest.mark.django_db
+def test_token_bucket():
+    state, wait = throttling.take(None, 4, 10, 2, now=0)
+    assert (state, wait) == ((6, 0), 0)
+    state, wait = throttling.take(state, 8, 10, 2, now=0.5)
+    assert (state, wait) == ((7, 0.5), 0.5)
+    state, wait = throttling.take(state, 8, 10, 2, now=1)
+    assert (state, wait) == ((0, 1), 0)
+    # refills up to the capacity only
+    assert throttling.take(state, 1, 10, 2, now=100) == ((9, 100), 0)
+    # a cost above the capacity needs a full bucket and leaves it in debt
+    state, wait = throttling.take(state, 14, 10, 2, now=100)
+    assert (state, wait) == ((-4, 100), 0)
+    state, wait = throttling.take(state, 1, 10, 2, now=101)
+    assert (state, wait) == ((-2, 101), 1.5)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connection_pool_reuses_connections():
+    connection.ensure_connection()
+    pid = connection.connection.info.backend_pid
+    connection.close()
+    connection.ensure_connection()
+    assert connection.connection.info.backend_pid == pid
+    assert connection.connection.closed == 0
+
+
+@pytest.mark.django_db
+def test_connection_pool():
+    def connect():
+        return psycopg2.connect(**params)
+
+    params = connection.get_connection_params()
+    pool = ConnectionPool(max_size=1, timeout=0.05, health_check_interval=0)
+    first = pool.acquire(connect)
+    with pytest.raises(OperationalError):
+        pool.acquire(connect)
+
+    # released mid transaction, it comes back rolled back
+    first.cursor().execute("SELECT 1")
+    pool.release(first)
+    assert pool.acquire(connect) is first
+    assert first.get_transaction_status() == extensions.TRANSACTION_STATUS_IDLE
+    pool.release(first)
+
+    # a connection killed while idle fails the health check and is replaced
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_terminate_backend(%s)", [first.info.backend_pid])
+    second = pool.acquire(connect)
+    assert second is not first
+    assert first.closed
+    pool.release(second)
+
+    pool.max_idle = 0
+    third = pool.acquire(connect)
+    assert third is not second
+    assert second.closed
+    pool.release(third)
+    pool.close_idle()
+    assert third.closed
+
+
+@pytest.mark.django_db(transaction=True)
+def test_warmup():
+    Operation.objects.create(type="Addition", cost=10)
+    catalog.reset()
+    registry.reset()
+    result = warmup.warm()
+    assert result["operations"] == Operation.objects.count()
+    assert catalog.cached is not None
+    assert registry.entries is not None
+    # the first request then needs no query for the catalog or the registry
+    with CaptureQueriesContext(connection) as queries:
+        catalog.get()
+        registry.get(1)
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_api_settings_cold_start():
+    code = (
+        "import sys, django; django.setup();"
+        "from django.urls import resolve;"
+        "resolve('/calculator/record/');"
+        "print(sorted(m for m in ('numpy', 'httpx', 'drf_spectacular.views')"
+        " if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "calculator.settings_api"},
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "[]"
+
+
 @pytest.mark.django_db
 def test_operation_list(get_bearer_token, client):
     Operation.objects.create(
@@ -351,4 +1606,4 @@ def test_operation_list(get_bearer_token, client):
     pytest.set_trace()
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) == 1
-    assert response.json()[0]["type"]== "suma"
\ No newline at end of file
+    assert response.json()[0]["type"] == "suma"
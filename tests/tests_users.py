@@ -1,8 +1,21 @@
 import base64
+import datetime
 import json
+from io import StringIO
 
 import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.core.cache import cache
 from django.urls import reverse
+from oauth2_provider.models import AccessToken, Application, RefreshToken
+from rest_framework.test import APIClient
+
+from apps.users import tokens
+from apps.users.authentication import token_key
+from apps.users.models import UserSession
 
 
 @pytest.mark.django_db
@@ -25,6 +38,53 @@ def test_login(client, header_auth_basic):
     assert response.json()["access_token"]
 
 
+@pytest.mark.django_db
+def test_login_replaces_token_pair(
+    client, header_auth_basic, django_assert_max_num_queries
+):
+    data = json.dumps({"username": "admin", "password": "123456"})
+    first = client.post(
+        reverse("login"),
+        data=data,
+        HTTP_AUTHORIZATION=header_auth_basic,
+        content_type="application/json",
+    ).json()
+
+    # user lookup, then delete + two inserts inside the savepoint; the
+    # application comes from the cache
+    with django_assert_max_num_queries(6):
+        second = client.post(
+            reverse("login"),
+            data=data,
+            HTTP_AUTHORIZATION=header_auth_basic,
+            content_type="application/json",
+        ).json()
+
+    assert second["access_token"] != first["access_token"]
+    assert list(AccessToken.objects.values_list("token", flat=True)) == [
+        second["access_token"]
+    ]
+    assert list(RefreshToken.objects.values_list("token", flat=True)) == [
+        second["refresh_token"]
+    ]
+
+
+@pytest.mark.django_db
+def test_login_application_cache_invalidation(client, header_auth_basic, secrets):
+    data = json.dumps({"username": "admin", "password": "123456"})
+    assert tokens.get_application(secrets["client_id"]) is not None
+
+    Application.objects.filter(client_id=secrets["client_id"]).get().delete()
+    response = client.post(
+        reverse("login"),
+        data=data,
+        HTTP_AUTHORIZATION=header_auth_basic,
+        content_type="application/json",
+    )
+    assert response.status_code == 401
+    assert response.json() == {"error": "Invalid application"}
+
+
 @pytest.mark.django_db
 def test_login_not_auth_header(client):
     data = {
@@ -171,3 +231,124 @@ def test_logout(get_bearer_token, client):
 
     assert response.status_code == 200
     assert response.json() == {"message": "Logged out successfully"}
+
+
+@pytest.mark.django_db
+def test_cached_token_authentication(
+    client,
+    get_bearer_token,
+    header_auth_basic,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    client.get(reverse("operation-list"), HTTP_AUTHORIZATION=get_bearer_token)
+    with django_assert_num_queries(0):
+        response = client.get(
+            reverse("operation-list"), HTTP_AUTHORIZATION=get_bearer_token
+        )
+    assert response.status_code == 200
+
+    # a new login revokes the cached token
+    with django_capture_on_commit_callbacks(execute=True):
+        new_token = client.post(
+            reverse("login"),
+            data=json.dumps({"username": "admin", "password": "123456"}),
+            HTTP_AUTHORIZATION=header_auth_basic,
+            content_type="application/json",
+        ).json()["access_token"]
+    response = client.get(
+        reverse("operation-list"), HTTP_AUTHORIZATION=get_bearer_token
+    )
+    assert response.status_code == 401
+
+    new_token = f"Bearer {new_token}"
+    client.get(reverse("operation-list"), HTTP_AUTHORIZATION=new_token)
+    assert cache.get(token_key(new_token.split()[1])) is not None
+    client.post(reverse("logout"), HTTP_AUTHORIZATION=new_token)
+    assert cache.get(token_key(new_token.split()[1])) is None
+    response = client.get(reverse("operation-list"), HTTP_AUTHORIZATION=new_token)
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_cached_token_follows_user_changes(client, get_bearer_token):
+    token = get_bearer_token.split()[1]
+    client.get(reverse("operation-list"), HTTP_AUTHORIZATION=get_bearer_token)
+    assert cache.get(token_key(token)).user.balance == 200
+
+    user = get_user_model().objects.get(username="admin")
+    user.balance = 500
+    user.save()
+    assert cache.get(token_key(token)) is None
+
+
+@pytest.mark.django_db
+def test_logout_revokes_user_sessions(client, get_bearer_token):
+    get_user_model().objects.create_user(username="other", password="123456")
+    for username in ("admin", "admin", "other"):
+        assert APIClient().login(username=username, password="123456")
+    assert Session.objects.count() == 3
+    assert UserSession.objects.filter(user__username="admin").count() == 2
+
+    response = client.post(reverse("logout"), HTTP_AUTHORIZATION=get_bearer_token)
+
+    assert response.status_code == 200
+    assert list(UserSession.objects.values_list("user__username", flat=True)) == [
+        "other"
+    ]
+    assert Session.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_purge_expired_auth(get_bearer_token, dry_run):
+    user = get_user_model().objects.get(username="admin")
+    application = Application.objects.get()
+    now = datetime.datetime.now()
+    for index in range(5):
+        expired = AccessToken.objects.create(
+            user=user,
+            application=application,
+            token=f"expired{index}",
+            expires=now - datetime.timedelta(hours=1),
+        )
+        RefreshToken.objects.create(
+            user=user,
+            application=application,
+            token=f"refresh{index}",
+            access_token=expired,
+            revoked=now - datetime.timedelta(hours=1) if index % 2 else None,
+        )
+    store = SessionStore()
+    for index in range(5):
+        Session.objects.create(
+            session_key=f"session{index}",
+            session_data=store.encode({"_auth_user_id": str(user.id)}),
+            expire_date=now + datetime.timedelta(days=1 if index % 2 else -1),
+        )
+        UserSession.objects.create(session_id=f"session{index}", user=user)
+
+    out = StringIO()
+    call_command("purge_expired_auth", batch_size=2, dry_run=dry_run, stdout=out)
+
+    if dry_run:
+        assert "access tokens: would delete 5 rows" in out.getvalue()
+        assert "refresh tokens: would delete 2 rows" in out.getvalue()
+        assert "sessions: would delete 3 rows" in out.getvalue()
+        assert AccessToken.objects.count() == 6
+        return
+    assert "access tokens: deleted 5 rows" in out.getvalue()
+    # the login token is still live
+    assert AccessToken.objects.get().token == get_bearer_token.split()[1]
+    # revoked refresh tokens go, the others are kept and detached
+    assert sorted(
+        RefreshToken.objects.filter(access_token__isnull=True).values_list(
+            "token", flat=True
+        )
+    ) == ["refresh0", "refresh2", "refresh4"]
+    assert not RefreshToken.objects.filter(revoked__isnull=False).exists()
+    assert sorted(Session.objects.values_list("session_key", flat=True)) == [
+        "session1",
+        "session3",
+    ]
+    assert UserSession.objects.count() == 2